@@ -1,24 +1,75 @@
+import asyncio
+import logging
 import os
-from contextlib import asynccontextmanager
+import queue
+from contextlib import asynccontextmanager, contextmanager
+from logging.handlers import QueueHandler, QueueListener
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.database import close_pools
 import src.routes
 from src import config  # Import config to load environment variables
 
+logger = logging.getLogger(__name__)
+
+
+def _warmup():
+    """Import the heavy ML/LLM modules and load the model ahead of the first request."""
+    import src.llm.chatbot
+    import src.services.evaluation.main_evaluator
+    from src.ml.infer import warm_model
+    warm_model()
+
+
+def _log_warmup_failure(task: asyncio.Task) -> None:
+    """Report a failed warmup; nothing awaits the task, so its exception would otherwise go unseen."""
+    if not task.cancelled() and (exc := task.exception()) is not None:
+        logger.error("Warmup failed; the first request will load the model instead", exc_info=exc)
+
+
+@contextmanager
+def _log_through_queue():
+    """
+    Route root log records through a queue so the stderr write happens on a background thread.
+    The original handlers are put back on exit, so records logged after shutdown still go out.
+    """
+    root = logging.getLogger()
+    original_handlers = root.handlers
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, *(original_handlers or [logging.StreamHandler()]), respect_handler_level=True
+    )
+    root.handlers = [QueueHandler(log_queue)]
+    listener.start()
+    try:
+        yield
+    finally:
+        # Flushes what is still queued before the handlers go back
+        listener.stop()
+        root.handlers = original_handlers
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    yield
-    await close_pools()
+    with _log_through_queue():
+        # Warm up in the background so /healthz answers as soon as the server is up
+        warmup_task = asyncio.create_task(asyncio.to_thread(_warmup))
+        warmup_task.add_done_callback(_log_warmup_failure)
+        yield
+        # Only stops waiting for the warmup; a thread that is still loading keeps running
+        warmup_task.cancel()
+        await close_pools()
 
 app = FastAPI(
     title="GlassScore Core System API",
     version="v1",
     description="API for the GlassScore Core System",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import sys
 
 # Load environment variables from .env file
 load_dotenv()
@@ -8,10 +9,21 @@ load_dotenv()
 # Prefer an explicit DATABASE_URL; fall back to SUPABASE_URL for backwards compatibility.
 DATABASE_URL = os.getenv("DATABASE_URL") or os.getenv("SUPABASE_URL")
 
+def _csv(name: str) -> tuple[str, ...]:
+    """Read a comma separated env var as an immutable tuple of stripped, non-empty items."""
+    return tuple(s.strip() for s in os.getenv(name, "").split(",") if s.strip())
+
 # API key lists (comma separated) expected in .env
-GEMINI_API_LIST = [i for i in os.getenv("GEMINI_API_LIST", "").split(",") if i]
-GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_TYPE", "gemini-2.5-flash")
-OPENAI_API_LIST = [i for i in os.getenv("OPENAI_API_LIST", "").split(",") if i]
-OPENAI_MODEL_NAME = os.getenv("OPENAI_MODEL_TYPE", "gpt-4o-mini")
+GEMINI_API_LIST = _csv("GEMINI_API_LIST")
+GEMINI_MODEL_NAME = sys.intern(os.getenv("GEMINI_MODEL_TYPE", "gemini-2.5-flash"))
+OPENAI_API_LIST = _csv("OPENAI_API_LIST")
+OPENAI_MODEL_NAME = sys.intern(os.getenv("OPENAI_MODEL_TYPE", "gpt-4o-mini"))
+# How many API keys each LLM request is sent to at once (first reply wins).
+# Values above 1 cut tail latency at the cost of proportionally more tokens.
+LLM_RACE_WIDTH = max(1, int(os.getenv("LLM_RACE_WIDTH", "1")))
+
+# How many evidence evaluations may call the LLM at once; the rest wait their turn
+# rather than all hitting the provider's rate limit together.
+LLM_CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "8")))
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -26,47 +26,109 @@ if sys.platform == 'win32':
 class _SQLitePoolWrapper:
     """
     Mimics the psycopg_pool interface for an in-memory SQLite database.
-    Since in-memory SQLite is wiped when the connection closes,
-    we maintain a SINGLE persistent connection.
+    Connections share a single in-memory database through SQLite's shared
+    cache. Since the database is wiped once its last connection closes,
+    a dedicated keeper connection stays open for the lifetime of the pool.
+
+    Shared-cache SQLite locks whole tables, and a conflicting writer fails at
+    once with SQLITE_LOCKED (busy_timeout does not retry it), so writers take
+    turns through one lock. Read-only borrows skip that lock; their
+    connections read uncommitted, which takes no table read locks.
     """
-    def __init__(self):
-        self._conn: Optional[aiosqlite.Connection] = None
-        self.min_size = 1
-        self.max_size = 1
+    _URI = "file:glassscore?mode=memory&cache=shared"
+
+    def __init__(self, size: int = 4):
+        self._keeper: Optional[aiosqlite.Connection] = None
+        self._conns: list[aiosqlite.Connection] = []
+        self._queue: Optional[asyncio.Queue[aiosqlite.Connection]] = None
+        self._open_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self.min_size = size
+        self.max_size = size
 
     async def open(self):
-        self._conn = await aiosqlite.connect(":memory:")
-        self._conn.row_factory = aiosqlite.Row
-        logger.info("✓ SQLite in-memory database initialized.")
+        # Concurrent first callers must not each build a keeper and queue
+        async with self._open_lock:
+            if self._queue is not None:
+                return
+            self._keeper = await aiosqlite.connect(self._URI, uri=True)
+            queue = asyncio.Queue()
+            for _ in range(self.max_size):
+                conn = await aiosqlite.connect(self._URI, uri=True)
+                conn.row_factory = aiosqlite.Row
+                await conn.execute("PRAGMA read_uncommitted = 1")
+                self._conns.append(conn)
+                queue.put_nowait(conn)
+            self._queue = queue
+            logger.info(f"✓ SQLite in-memory database initialized (size: {self.min_size}-{self.max_size}).")
 
     async def close(self):
-        if self._conn:
-            await self._conn.close()
-            logger.info("SQLite connection closed.")
+        for conn in self._conns:
+            await conn.close()
+        self._conns.clear()
+        self._queue = None
+        if self._keeper:
+            await self._keeper.close()
+            self._keeper = None
+            logger.info("SQLite connections closed.")
 
     @asynccontextmanager
-    async def connection(self):
-        """Yields the shared connection."""
-        if not self._conn:
+    async def connection(self, readonly: bool = False):
+        """
+        Borrows a connection from the pool and returns it on exit.
+        Unless readonly, the borrow also holds the writer lock.
+        """
+        if self._queue is None:
             await self.open()
-        yield self._conn
+        if readonly:
+            conn = await self._queue.get()
+            try:
+                yield conn
+            finally:
+                self._queue.put_nowait(conn)
+            return
+
+        async with self._write_lock:
+            conn = await self._queue.get()
+            try:
+                yield conn
+            finally:
+                self._queue.put_nowait(conn)
 
     def get_stats(self) -> dict:
-        return {"status": "running", "mode": "sqlite_memory"}
+        return {
+            "status": "running",
+            "mode": "sqlite_memory",
+            "pool_min": self.min_size,
+            "pool_max": self.max_size,
+            "pool_available": self._queue.qsize() if self._queue else 0,
+        }
 
 
 # Global async connection pools
 _async_db_pool: Optional[AsyncConnectionPool | _SQLitePoolWrapper] = None
+_checkpoint_db_pool: Optional[AsyncConnectionPool] = None
 
 
 async def _check_connection_healthy(conn: AsyncConnection):
     await conn.execute("SELECT 1;")
 
-def _create_async_db_pool(conn_url: str):
+def _prepare_threshold(conn_url: str) -> Optional[int]:
+    """
+    Server-side prepared statements cut parse/plan round-trips, but the
+    Supabase Transaction Mode pooler (port 6543) hands each transaction a
+    different backend, so they must stay disabled there.
+    """
+    if ":6543/" in conn_url:
+        return None
+    return 5
+
+
+def _create_async_db_pool(conn_url: str, min_size: int = 2, max_size: int = 10, autocommit: bool = False):
     return AsyncConnectionPool(
         conninfo=conn_url,
-        min_size=2,
-        max_size=10,
+        min_size=min_size,
+        max_size=max_size,
         max_waiting=20,
         max_idle=300,
         timeout=30,
@@ -74,7 +136,8 @@ def _create_async_db_pool(conn_url: str):
         check=_check_connection_healthy,
         kwargs={
             "row_factory": dict_row,
-            "prepare_threshold": None,
+            "prepare_threshold": _prepare_threshold(conn_url),
+            "autocommit": autocommit,
         },
     )
 
@@ -106,13 +169,34 @@ async def get_async_db_pool() -> AsyncConnectionPool | _SQLitePoolWrapper:
     return _async_db_pool
 
 
+async def get_checkpoint_db_pool() -> Optional[AsyncConnectionPool]:
+    """
+    Get or initialize the autocommit pool used by the LangGraph checkpointer.
+
+    The checkpointer issues many small independent statements (and already
+    batches its writes in pipeline mode); autocommit connections spare each
+    of them the trailing COMMIT round-trip. Returns None without DATABASE_URL.
+    """
+    global _checkpoint_db_pool
+    if _checkpoint_db_pool:
+        return _checkpoint_db_pool
+
+    if not DATABASE_URL:
+        return None
+
+    _checkpoint_db_pool = _create_async_db_pool(DATABASE_URL, min_size=1, max_size=5, autocommit=True)
+    await _checkpoint_db_pool.open()
+    logger.info(f"✓ Checkpoint database pool opened (size: {_checkpoint_db_pool.min_size}-{_checkpoint_db_pool.max_size})")
+    return _checkpoint_db_pool
+
+
 # ============================================================================
 #                    CONNECTION-LEVEL CONTEXT MANAGERS
 #           (Use for transactions, commit/rollback control)
 # ============================================================================
 
 @asynccontextmanager
-async def get_async_db_connection() -> AsyncContextManager[AsyncConnection]:
+async def get_async_db_connection(pipeline: bool = False) -> AsyncContextManager[AsyncConnection]:
     """
     Get an async connection to the primary database from the connection pool.
 
@@ -128,13 +212,20 @@ async def get_async_db_connection() -> AsyncContextManager[AsyncConnection]:
             await cur.execute("INSERT INTO profiles ...")
             await conn.commit()
 
+    Pass pipeline=True to run the block in psycopg pipeline mode, which
+    batches the statements into fewer round-trips (Postgres only).
+
     The connection is automatically returned to the pool when the context exits.
     """
     pool = await get_async_db_pool()
     conn = None
     try:
         async with pool.connection() as conn:
-            yield conn
+            if pipeline and isinstance(pool, AsyncConnectionPool):
+                async with conn.pipeline():
+                    yield conn
+            else:
+                yield conn
             await conn.commit()
     except Exception as exc:
         logger.error(f"Database error: {exc}")
@@ -155,7 +246,6 @@ async def get_async_db_cursor() -> AsyncContextManager[AsyncCursor | AsyncServer
 
     Use this when you need:
     - Single SELECT queries
-    - Single INSERT/UPDATE/DELETE without transaction control
     - Read-only operations
     - Simple operations that don't require rollback
 
@@ -166,7 +256,40 @@ async def get_async_db_cursor() -> AsyncContextManager[AsyncCursor | AsyncServer
 
     ⚠️ WARNING: Each call gets a separate connection from the pool.
     Do NOT use this for multi-statement transactions - use get_async_db_connection() instead.
-    The connection auto-commits on success.
+    Statements run in autocommit, so no transaction is left open for the pool
+    to roll back; use get_async_db_cursor_tx() for writes.
+    """
+    pool = await get_async_db_pool()
+    if not isinstance(pool, AsyncConnectionPool):
+        # SQLite opens no implicit transaction for reads, and they need not wait for writers
+        async with pool.connection(readonly=True) as conn:
+            async with conn.cursor() as cur:
+                yield cur
+        return
+
+    async with pool.connection() as conn:
+        # Switching autocommit only flips a client-side flag (no round-trip);
+        # it is switched back so the pool keeps handing out transactional connections
+        await conn.set_autocommit(True)
+        try:
+            # Binary results skip text decoding
+            async with conn.cursor(binary=True) as cur:
+                yield cur
+        finally:
+            if not conn.closed:
+                await conn.set_autocommit(False)
+
+
+@asynccontextmanager
+async def get_async_db_cursor_tx() -> AsyncContextManager[AsyncCursor | AsyncServerCursor]:
+    """
+    Get a cursor for a single INSERT/UPDATE/DELETE that should be committed.
+
+    Example:
+        async with get_async_db_cursor_tx() as cur:
+            await cur.execute("UPDATE users SET name = %s WHERE id = %s", (name, user_id))
+
+    The connection commits on success and rolls back on error.
     """
     async with get_async_db_connection() as conn:
         async with conn.cursor() as cur:
@@ -179,23 +302,35 @@ async def get_async_db_cursor() -> AsyncContextManager[AsyncCursor | AsyncServer
 
 async def close_pools():
     """Close all connection pools gracefully."""
-    global _async_db_pool
+    global _async_db_pool, _checkpoint_db_pool
 
     if _async_db_pool is not None:
         logger.info("Closing primary database pool...")
         await _async_db_pool.close()
         _async_db_pool = None
 
+    if _checkpoint_db_pool is not None:
+        logger.info("Closing checkpoint database pool...")
+        await _checkpoint_db_pool.close()
+        _checkpoint_db_pool = None
+
 
 @atexit.register
 def _sync_close_pools():
     """Synchronous atexit fallback for async pool cleanup."""
-    global _async_db_pool
+    global _async_db_pool, _checkpoint_db_pool
+
+    # Already closed (e.g. by the FastAPI lifespan), nothing to do
+    if _async_db_pool is None and _checkpoint_db_pool is None:
+        return
 
     async def _close_all():
         if _async_db_pool is not None:
             await _async_db_pool.close()
+        if _checkpoint_db_pool is not None:
+            await _checkpoint_db_pool.close()
 
+    loop = None
     try:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
@@ -204,7 +339,8 @@ def _sync_close_pools():
     except Exception as e:
         logger.error(f"Error closing async pools during atexit: {e}")
     finally:
-        loop.close()
+        if loop is not None:
+            loop.close()
 
 
 # ============================================================================
@@ -219,10 +355,12 @@ async def get_pool_stats() -> dict[str, int]:
 __all__ = [
     # Direct pool access
     "get_async_db_pool",
+    "get_checkpoint_db_pool",
     # Async connection-level (for transactions)
     "get_async_db_connection",
     # Async cursor-level (for simple queries)
     "get_async_db_cursor",
+    "get_async_db_cursor_tx",
     # Lifecycle management
     "close_pools",
     "get_pool_stats",
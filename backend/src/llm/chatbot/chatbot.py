@@ -1,10 +1,13 @@
 # src/agent_main.py
 import asyncio
+import functools
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Dict
 
+from cachetools import TTLCache
 from langchain.agents import create_agent
-from langchain.agents.middleware import SummarizationMiddleware
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, SummarizationMiddleware
 from langchain_core.messages import ToolMessage, BaseMessage
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langgraph.graph.state import CompiledStateGraph
@@ -19,7 +22,29 @@ from src.services.file_parser import prepare_image_message, prepare_file_message
 from src.models.chatbot import ChatResponse, Action
 
 # Global attachment cache: {thread_id: [attachment_dicts]}
-_attachment_cache: dict[str, list[dict[str, Any]]] = {}
+# Bounded with a TTL so abandoned threads don't pin base64 payloads forever
+_attachment_cache: TTLCache[str, list[dict[str, Any]]] = TTLCache(maxsize=1024, ttl=3600)
+
+
+@functools.lru_cache(maxsize=1)
+def _base_prompt() -> str:
+    return load_prompt("chatbot_system.txt")
+
+
+@functools.lru_cache(maxsize=4)
+def _system_prompt_for(date_str: str) -> str:
+    return f"{_base_prompt()}\n\nCurrent date: {date_str}"
+
+
+class _RoutedModelMiddleware(AgentMiddleware):
+    """
+    Re-resolve the model from rotating_llm on every model call. Bots are cached for
+    many turns, and the runnable they were built with fixes one fallback order,
+    which would keep a thread on one key regardless of load or open circuits.
+    """
+
+    async def awrap_model_call(self, request: ModelRequest, handler):
+        return await handler(request.override(model=await rotating_llm.get_runnable()))
 
 
 class Chatbot:
@@ -27,6 +52,28 @@ class Chatbot:
     Async chatbot agent with interruptable tool handling and persistent memory.
     """
 
+    # Process-wide registry of initialized bots keyed by (current_user, thread_id), least recently used first
+    _BOTS: OrderedDict[tuple[int | None, str], "Chatbot"] = OrderedDict()
+    _MAX_BOTS = 512
+
+    @classmethod
+    def get(cls, thread_id: str, current_user: int | None = None) -> "Chatbot":
+        """Return the cached bot for (current_user, thread_id), creating it (and evicting the LRU bot) if needed."""
+        # Keyed by user too, so a bot bound to one user's tools is never handed to another
+        key = (current_user, thread_id)
+        bot = cls._BOTS.get(key)
+        if bot is not None:
+            cls._BOTS.move_to_end(key)
+            return bot
+
+        bot = cls(thread_id=thread_id, current_user=current_user)
+        cls._BOTS[key] = bot
+        if len(cls._BOTS) > cls._MAX_BOTS:
+            # Only forget the bot: a request may still be using its agent, and
+            # it is garbage collected once the last such request lets go
+            cls._BOTS.popitem(last=False)
+        return bot
+
     def __init__(self, thread_id: str = "chat-1", current_user: int | None = None):
         self.thread_id = thread_id
         self.prev_result: dict[str, Any] = {}
@@ -34,6 +81,7 @@ class Chatbot:
         self.initialized: bool = False
         self.current_user: int | None = current_user
         self.handler: ToolContextHandler | None = None
+        self._init_lock = asyncio.Lock()
 
         if self.current_user is None:
             print("⚠️ current_user is None; disabling user-related tools")
@@ -43,53 +91,66 @@ class Chatbot:
         if self.initialized:
             return
 
-        # Load rotating model
-        model = await rotating_llm.get_runnable()
-
-        # Persistent memory
-        checkpointer: AsyncPostgresSaver = await get_chat_postgres_saver_async()
-
-        # Middleware: summarize older messages
-        summarization = SummarizationMiddleware(model=model, max_tokens_before_summary=3000, messages_to_keep=5)
-
-        # Setup tools and handler
-        available_tools = [
-            tools.calc, 
-        ]
-        # Filter out None values (when current_user is None)
-        available_tools = [t for t in available_tools if t is not None]
-        self.handler = ToolContextHandler(available_tools)
-
-        current_date = datetime.now().strftime("%Y-%m-%d (%A)")
-        base_prompt = load_prompt("chatbot_system.txt")
-        system_prompt_with_date = f"{base_prompt}\n\nCurrent date: {current_date}"
-
-        # Create interruptable agent
-        self.agent_graph = create_agent(
-            model=model,
-            tools=available_tools,
-            checkpointer=checkpointer,
-            system_prompt=system_prompt_with_date,
-            middleware=[summarization],
-            interrupt_before=["tools"],   # ✅ Pause before tools
-            debug=False,
-        )
+        # Only one concurrent caller builds the agent; the rest wait and reuse it
+        async with self._init_lock:
+            if self.initialized:
+                return
+
+            # Load rotating model
+            model = await rotating_llm.get_runnable()
+
+            # Persistent memory
+            checkpointer: AsyncPostgresSaver = await get_chat_postgres_saver_async()
+
+            # Middleware: summarize older messages (the summarizer keeps the model it is built with),
+            # and route each chat model call afresh
+            summarization = SummarizationMiddleware(model=model, max_tokens_before_summary=3000, messages_to_keep=5)
+
+            # Setup tools and handler
+            available_tools = [
+                tools.calc, 
+            ]
+            # Filter out None values (when current_user is None)
+            available_tools = [t for t in available_tools if t is not None]
+            self.handler = ToolContextHandler(available_tools)
+
+            current_date = datetime.now().strftime("%Y-%m-%d (%A)")
+            system_prompt_with_date = _system_prompt_for(current_date)
+
+            # Create interruptable agent
+            self.agent_graph = create_agent(
+                model=model,
+                tools=available_tools,
+                checkpointer=checkpointer,
+                system_prompt=system_prompt_with_date,
+                middleware=[summarization, _RoutedModelMiddleware()],
+                interrupt_before=["tools"],   # ✅ Pause before tools
+                debug=False,
+            )
 
-        self.initialized = True
-        print(f"✅ Chatbot initialized for thread_id={self.thread_id}")
+            self.initialized = True
+            print(f"✅ Chatbot initialized for thread_id={self.thread_id}")
 
-    async def _create_tool_message(self, text: str) -> ToolMessage:
-        """
-        Adds a tool message in place if applicable
-        :return: the list passed in
-        """
-        # User rejected - inject a tool response indicating the tool was declined
-        config = {"configurable": {"thread_id": self.thread_id}}
+    async def _get_last_message(self) -> BaseMessage | None:
+        """Fetch the thread's latest message with a single state read."""
+        try:
+            config = {"configurable": {"thread_id": self.thread_id}}
+            state: StateSnapshot = await self.agent_graph.aget_state(config)
+            return state.values.get("messages", [])[-1]
+        except (IndexError, KeyError, ValueError, AttributeError):
+            return None
 
-        state: StateSnapshot = await self.agent_graph.aget_state(config)
-        last_message = state.values.get("messages", [])[-1]
+    @staticmethod
+    def _has_tool_call(message: BaseMessage | None) -> bool:
+        return bool(getattr(message, "tool_calls", None))
 
-        if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+    @staticmethod
+    def _create_tool_message(text: str, last_message: BaseMessage | None) -> ToolMessage:
+        """
+        Builds a tool message answering the pending tool call of last_message
+        :return: the tool message
+        """
+        if Chatbot._has_tool_call(last_message):
             tool_call = last_message.tool_calls[0]
             return ToolMessage(
                 content=text,
@@ -100,17 +161,14 @@ class Chatbot:
 
     def _prepend_cached_attachments(self, _messages: list | None) -> list:
         """Prepend cached attachments to messages and clear cache."""
-        if self.thread_id in _attachment_cache and _attachment_cache[self.thread_id]:
-            attachments = _attachment_cache[self.thread_id]
-            if _messages:
-                # Insert attachments before user messages
-                for attachment in attachments:
-                    _messages.insert(0, attachment)
-            else:
-                _messages = attachments.copy()
-            # Clear cache after using
-            _attachment_cache[self.thread_id] = []
-        return _messages
+        # Taking the entry out of the cache also clears it
+        attachments = _attachment_cache.pop(self.thread_id, None)
+        if not attachments:
+            return _messages
+        if _messages:
+            # Attachments go before user messages
+            attachments.extend(_messages)
+        return attachments
 
     async def send_message(self, _messages: MessagesType) -> ChatResponse:
         """Send user text to the agent and handle interruptions."""
@@ -185,7 +243,8 @@ class Chatbot:
 
     async def continue_with_tool_result(self, tool_result: str):
         try:
-            return await self.send_message(await self._create_tool_message(tool_result))
+            last_message = await self._get_last_message()
+            return await self.send_message(self._create_tool_message(tool_result, last_message))
         except AssertionError:
             return await self.send_message(tool_result)
 
@@ -193,9 +252,10 @@ class Chatbot:
         if not self.initialized:
             await self.initialize()
 
-        if not await self.has_pending_action():
+        last_message = await self._get_last_message()
+        if not self._has_tool_call(last_message):
             return await self.send_message(_messages)
-        decline_message = await self._create_tool_message("User didn't choose confirm")
+        decline_message = self._create_tool_message("User didn't choose confirm", last_message)
         messages = rotating_llm.format_messages(_messages)
         messages.insert(0, decline_message)
         return await self.send_message(messages)
@@ -206,25 +266,18 @@ class Chatbot:
         if not self.initialized:
             await self.initialize()
 
-        if not await self.has_pending_action():
+        last_message = await self._get_last_message()
+        if not self._has_tool_call(last_message):
             raise ValueError("No pending action to confirm")
 
         if not approved:
-            decline_message = await self._create_tool_message("User declined this action.")
+            decline_message = self._create_tool_message("User declined this action.", last_message)
             return await self.send_message(decline_message)
         else:
             return await self.send_message(None)
 
     async def has_pending_action(self):
-        try:
-            config = {"configurable": {"thread_id": self.thread_id}}
-
-            state = await self.agent_graph.aget_state(config)
-
-            last_message = state.values.get("messages", [])[-1]
-            return hasattr(last_message, "tool_calls") and last_message.tool_calls
-        except (IndexError, KeyError, ValueError, AttributeError):
-            return False
+        return self._has_tool_call(await self._get_last_message())
 
 
     @staticmethod
@@ -243,9 +296,6 @@ class Chatbot:
 
     async def attach_content(self, content: Any, content_type: str = "text", mime_type: str | None = None):
         """Attach content (text, base64 image, or base64 file) to be prepended in next message."""
-        if self.thread_id not in _attachment_cache:
-            _attachment_cache[self.thread_id] = []
-        
         if content_type == "image":
             # Use file_parser service to prepare image message
             mime = mime_type or "image/jpeg"
@@ -269,7 +319,7 @@ class Chatbot:
                 "content": content
             }
         
-        _attachment_cache[self.thread_id].append(message_entry)
+        _attachment_cache.setdefault(self.thread_id, []).append(message_entry)
         print(f"📎 Cached {content_type} attachment for {self.thread_id}")
 
     async def clear_memory(self):
@@ -285,8 +335,7 @@ class Chatbot:
         await checkpointer.adelete_thread(self.thread_id)
         
         # Also clear attachment cache
-        if self.thread_id in _attachment_cache:
-            _attachment_cache[self.thread_id] = []
+        _attachment_cache.pop(self.thread_id, None)
         
         print(f"🗑️ Cleared memory for thread_id={self.thread_id}")
 
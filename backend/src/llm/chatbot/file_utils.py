@@ -3,8 +3,24 @@ Utility functions for extracting text from base64-encoded files.
 Supports: PDF, Word (.docx), Excel (.xlsx), PowerPoint (.pptx), and plain text files.
 """
 import base64
+import binascii
 import io
-from typing import Optional
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+try:
+    import charset_normalizer
+except ImportError:
+    charset_normalizer = None
 
 try:
     import pdfplumber
@@ -16,6 +32,11 @@ try:
 except ImportError:
     Document = None
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 try:
     from openpyxl import load_workbook
 except ImportError:
@@ -26,6 +47,28 @@ try:
 except ImportError:
     Presentation = None
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# PDFs shorter than this are extracted in-process; the worker startup and
+# per-worker re-parse of the document cost more than they save
+_PDF_PARALLEL_MIN_PAGES = 8
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = _W_NS + "body"
+_W_P = _W_NS + "p"
+_W_T = _W_NS + "t"
+_W_TBL = _W_NS + "tbl"
+_W_TR = _W_NS + "tr"
+_W_TC = _W_NS + "tc"
+
+_P_NS = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_P_SP = _P_NS + "sp"
+_P_SP_TREE = _P_NS + "spTree"
+_A_P = _A_NS + "p"
+_A_T = _A_NS + "t"
+_SLIDE_PART_RE = re.compile(r"ppt/slides/slide(\d+)\.xml")
+
 
 def extract_text_from_base64(base64_content: str, mime_type: str) -> str:
     """
@@ -42,51 +85,90 @@ def extract_text_from_base64(base64_content: str, mime_type: str) -> str:
         ValueError: If file type is unsupported or required library is not installed
     """
     try:
-        file_bytes = base64.b64decode(base64_content)
-        file_stream = io.BytesIO(file_bytes)
+        file_bytes = _decode_base64(base64_content)
     except Exception as e:
         raise ValueError(f"Failed to decode base64 content: {e}")
+
+    # Clients often send a generic MIME type (e.g. application/octet-stream)
+    # for real documents, so trust the file's own signature first
+    handler = _sniff_extractor(file_bytes)
+    if handler is None:
+        # Plain text files are decoded straight from the bytes, no stream needed
+        if mime_type.startswith("text/"):
+            return _decode_text(file_bytes)
+
+        handler = _MIME_DISPATCH.get(mime_type)
+        if handler is None:
+            raise ValueError(f"Unsupported MIME type: {mime_type}")
     
-    # PDF files
-    if mime_type == "application/pdf":
-        return _extract_pdf(file_stream)
-    
-    # Word documents
-    elif mime_type in [
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        "application/msword"
-    ]:
-        return _extract_docx(file_stream)
+    # BytesIO shares the decoded buffer until written to, so this is not a copy
+    return handler(io.BytesIO(file_bytes))
+
+
+def _decode_base64(base64_content: str) -> bytes:
+    """Decode base64 content, using the SIMD decoder from pybase64 when installed."""
+    # Clean base64 (the common case from the JSON API) takes the strict path,
+    # which decodes whole blocks without per-byte whitespace checks
+    try:
+        if pybase64 is not None:
+            return pybase64.b64decode(base64_content, validate=True)
+        return base64.b64decode(base64_content, validate=True)
+    except (binascii.Error, ValueError):
+        pass
+
+    # Line-wrapped or padded input: strip whitespace and decode forgivingly
+    cleaned = _WHITESPACE_RE.sub("", base64_content)
+    if pybase64 is not None:
+        return pybase64.b64decode(cleaned, validate=False)
+    return binascii.a2b_base64(cleaned)
+
+
+def _decode_text(file_bytes: bytes) -> str:
+    """Decode a plain text file, detecting the encoding when it is not UTF-8."""
+    try:
+        return file_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        pass
     
-    # Excel files
-    elif mime_type in [
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        "application/vnd.ms-excel"
-    ]:
-        return _extract_xlsx(file_stream)
+    # Detect the encoding once and decode once
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(file_bytes).best()
+        if best is not None:
+            return str(best)
     
-    # PowerPoint files
-    elif mime_type in [
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        "application/vnd.ms-powerpoint"
-    ]:
-        return _extract_pptx(file_stream)
+    # latin-1 maps every byte, so this cannot fail
+    return file_bytes.decode('latin-1')
+
+
+def _sniff_extractor(file_bytes: bytes) -> Optional[Callable[[io.BytesIO], str]]:
+    """Pick an extractor from the file's magic bytes, or None if it is not a known document."""
+    if file_bytes[:5] == b"%PDF-":
+        return _extract_pdf
     
-    # Plain text files
-    elif mime_type.startswith("text/"):
+    if file_bytes[:4] == b"PK\x03\x04":
+        # OOXML packages are zips; the main part tells the formats apart
         try:
-            return file_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            # Try other common encodings
-            for encoding in ['latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    return file_bytes.decode(encoding)
-                except UnicodeDecodeError:
-                    continue
-            raise ValueError("Failed to decode text file with common encodings")
+            with zipfile.ZipFile(io.BytesIO(file_bytes)) as package:
+                names = set(package.namelist())
+        except zipfile.BadZipFile:
+            return None
+        for main_part, extractor in _OOXML_MAIN_PARTS:
+            if main_part in names:
+                return extractor
     
-    else:
-        raise ValueError(f"Unsupported MIME type: {mime_type}")
+    return None
+
+
+@lru_cache(maxsize=1)
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all PDF extractions (pdfminer is pure Python and holds the GIL)."""
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+
+
+def _extract_pdf_pages(pdf_bytes: bytes, start: int, stop: int) -> list[str]:
+    """Extract text from pages [start, stop) of a PDF. Runs in a worker process."""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
 
 
 def _extract_pdf(file_stream: io.BytesIO) -> str:
@@ -94,13 +176,28 @@ def _extract_pdf(file_stream: io.BytesIO) -> str:
     if pdfplumber is None:
         raise ValueError("pdfplumber is not installed. Run: pip install pdfplumber")
     
-    text_parts = []
     with pdfplumber.open(file_stream) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                text_parts.append(text)
+        n_pages = len(pdf.pages)
+        # One slot per page, filled in place in page order
+        page_texts: list[Optional[str]] = [None] * n_pages
+        if n_pages < _PDF_PARALLEL_MIN_PAGES:
+            for i, page in enumerate(pdf.pages):
+                page_texts[i] = page.extract_text()
     
+    if n_pages >= _PDF_PARALLEL_MIN_PAGES:
+        # Split the pages into one contiguous range per worker; each worker
+        # re-opens the document from the raw bytes
+        pdf_bytes = file_stream.getvalue()
+        max_workers = min(n_pages, os.cpu_count() or 1)
+        step = -(-n_pages // max_workers)
+        futures = {
+            start: _get_pdf_pool().submit(_extract_pdf_pages, pdf_bytes, start, start + step)
+            for start in range(0, n_pages, step)
+        }
+        for start, future in futures.items():
+            page_texts[start:start + step] = future.result()
+    
+    text_parts = [text for text in page_texts if text]
     if not text_parts:
         return "[No text content found in PDF]"
     
@@ -109,6 +206,13 @@ def _extract_pdf(file_stream: io.BytesIO) -> str:
 
 def _extract_docx(file_stream: io.BytesIO) -> str:
     """Extract text from Word document."""
+    if etree is not None:
+        try:
+            return _extract_docx_xml(file_stream)
+        except (KeyError, zipfile.BadZipFile, etree.XMLSyntaxError):
+            # Malformed package; let python-docx have a go
+            file_stream.seek(0)
+    
     if Document is None:
         raise ValueError("python-docx is not installed. Run: pip install python-docx")
     
@@ -116,8 +220,10 @@ def _extract_docx(file_stream: io.BytesIO) -> str:
     text_parts = []
     
     for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            text_parts.append(paragraph.text)
+        # .text rebuilds the string from the runs on every access
+        text = paragraph.text
+        if text.strip():
+            text_parts.append(text)
     
     # Also extract text from tables
     for table in doc.tables:
@@ -132,25 +238,90 @@ def _extract_docx(file_stream: io.BytesIO) -> str:
     return "\n\n".join(text_parts)
 
 
+def _docx_paragraph_text(paragraph) -> str:
+    return "".join(t.text or "" for t in paragraph.iter(_W_T))
+
+
+def _docx_row_text(row) -> str:
+    return " | ".join(
+        "\n".join(_docx_paragraph_text(p) for p in cell.iterchildren(_W_P)).strip()
+        for cell in row.iterchildren(_W_TC)
+    )
+
+
+def _extract_docx_xml(file_stream: io.BytesIO) -> str:
+    """
+    Extract text from word/document.xml by streaming it with iterparse.
+    
+    Produces the same layout as the python-docx path (body paragraphs, then
+    table rows) without building python-docx wrapper objects.
+    """
+    paragraphs = []
+    rows = []
+    with zipfile.ZipFile(file_stream) as package, package.open("word/document.xml") as xml:
+        for _, el in etree.iterparse(xml, events=("end",), tag=(_W_P, _W_TBL)):
+            parent = el.getparent()
+            # Paragraphs inside table cells are read with their table
+            if parent is None or parent.tag != _W_BODY:
+                continue
+            
+            if el.tag == _W_P:
+                text = _docx_paragraph_text(el)
+                if text.strip():
+                    paragraphs.append(text)
+            else:
+                rows.extend(
+                    row_text for row_text in map(_docx_row_text, el.iterchildren(_W_TR))
+                    if row_text.strip()
+                )
+            
+            # Free the handled subtree and its already-processed siblings
+            el.clear()
+            while el.getprevious() is not None:
+                del parent[0]
+    
+    text_parts = paragraphs + rows
+    if not text_parts:
+        return "[No text content found in Word document]"
+    
+    return "\n\n".join(text_parts)
+
+
 def _extract_xlsx(file_stream: io.BytesIO) -> str:
     """Extract text from Excel file."""
     if load_workbook is None:
         raise ValueError("openpyxl is not installed. Run: pip install openpyxl")
     
-    workbook = load_workbook(file_stream, data_only=True)
+    # read_only streams each worksheet's XML row by row instead of building
+    # the whole cell model up front
+    workbook = load_workbook(file_stream, data_only=True, read_only=True, keep_links=False)
     text_parts = []
+    produced_data = False
     
-    for sheet_name in workbook.sheetnames:
-        sheet = workbook[sheet_name]
-        text_parts.append(f"=== Sheet: {sheet_name} ===")
-        
-        for row in sheet.iter_rows(values_only=True):
-            # Filter out empty cells and convert to strings
-            row_values = [str(cell) for cell in row if cell is not None and str(cell).strip()]
-            if row_values:
-                text_parts.append(" | ".join(row_values))
+    try:
+        for sheet in workbook.worksheets:
+            text_parts.append(f"=== Sheet: {sheet.title} ===")
+            # The stored dimensions are often stale (e.g. after rows were
+            # deleted) and read-only sheets pad every row out to them; drop
+            # them so only rows actually present in the XML are yielded
+            sheet.reset_dimensions()
+            
+            for row in sheet.iter_rows(values_only=True):
+                # Filter out empty cells and convert to strings (once per cell;
+                # string cells are used as-is)
+                row_values = [
+                    value for cell in row
+                    if cell is not None
+                    and (value := cell if isinstance(cell, str) else str(cell)).strip()
+                ]
+                if row_values:
+                    text_parts.append(" | ".join(row_values))
+                    produced_data = True
+    finally:
+        # Read-only workbooks keep the archive open until closed
+        workbook.close()
     
-    if len(text_parts) <= len(workbook.sheetnames):  # Only sheet headers
+    if not produced_data:  # Only sheet headers
         return "[No data found in Excel file]"
     
     return "\n".join(text_parts)
@@ -158,6 +329,13 @@ def _extract_xlsx(file_stream: io.BytesIO) -> str:
 
 def _extract_pptx(file_stream: io.BytesIO) -> str:
     """Extract text from PowerPoint presentation."""
+    if etree is not None:
+        try:
+            return _extract_pptx_xml(file_stream)
+        except (zipfile.BadZipFile, etree.XMLSyntaxError):
+            # Malformed package; let python-pptx have a go
+            file_stream.seek(0)
+    
     if Presentation is None:
         raise ValueError("python-pptx is not installed. Run: pip install python-pptx")
     
@@ -177,6 +355,75 @@ def _extract_pptx(file_stream: io.BytesIO) -> str:
     return "\n\n".join(text_parts)
 
 
+def _pptx_shape_text(shape) -> str:
+    return "\n".join(
+        "".join(t.text or "" for t in paragraph.iter(_A_T))
+        for paragraph in shape.iter(_A_P)
+    )
+
+
+def _extract_pptx_xml(file_stream: io.BytesIO) -> str:
+    """
+    Extract text from the slide parts by streaming them with iterparse.
+    
+    Produces the same layout as the python-pptx path (a header per slide,
+    then the text of each top-level shape) without building the shape tree.
+    """
+    text_parts = []
+    with zipfile.ZipFile(file_stream) as package:
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in package.namelist()
+            if (match := _SLIDE_PART_RE.fullmatch(name))
+        )
+        for i, (_, name) in enumerate(slides, 1):
+            text_parts.append(f"=== Slide {i} ===")
+            
+            with package.open(name) as xml:
+                for _, el in etree.iterparse(xml, events=("end",), tag=_P_SP):
+                    parent = el.getparent()
+                    # Shapes inside groups have no text of their own in python-pptx
+                    if parent is None or parent.tag != _P_SP_TREE:
+                        continue
+                    
+                    text = _pptx_shape_text(el)
+                    if text.strip():
+                        text_parts.append(text)
+                    
+                    # Free the handled shape and its already-processed siblings
+                    el.clear()
+                    while el.getprevious() is not None:
+                        del parent[0]
+    
+    if not text_parts:
+        return "[No text content found in PowerPoint]"
+    
+    return "\n\n".join(text_parts)
+
+
+# Main part of each OOXML package type, as found in the zip directory
+_OOXML_MAIN_PARTS: tuple[tuple[str, Callable[[io.BytesIO], str]], ...] = (
+    ("word/document.xml", _extract_docx),
+    ("xl/workbook.xml", _extract_xlsx),
+    ("ppt/presentation.xml", _extract_pptx),
+)
+
+# Binary document formats, keyed by MIME type
+_MIME_DISPATCH: dict[str, Callable[[io.BytesIO], str]] = {
+    # PDF files
+    "application/pdf": _extract_pdf,
+    # Word documents
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": _extract_docx,
+    "application/msword": _extract_docx,
+    # Excel files
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": _extract_xlsx,
+    "application/vnd.ms-excel": _extract_xlsx,
+    # PowerPoint files
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": _extract_pptx,
+    "application/vnd.ms-powerpoint": _extract_pptx,
+}
+
+
 def get_supported_mime_types() -> list[str]:
     """Return list of supported MIME types."""
     return [
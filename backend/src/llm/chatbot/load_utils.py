@@ -1,9 +1,8 @@
-import traceback
+from functools import lru_cache
 from pathlib import Path
 
 
-from pathlib import Path
-
+@lru_cache(maxsize=None)
 def load_prompt(filename) -> str:
     """
     Load a system prompt with the following strategy:
@@ -17,18 +16,18 @@ def load_prompt(filename) -> str:
     try:
         return importlib_resources.read_text("src.llm.prompts", filename)
     except Exception as e:
-        traceback.print_exc()
+        resource_error = e
 
     # 2) Try local fallback path
     candidate = Path(__file__).resolve().parent / "prompts" / filename
     try:
         return candidate.read_text(encoding="utf-8")
     except Exception as e:
-        traceback.print_exc()
-
-    # 3) Combine both errors if both failed
-    raise RuntimeError(f"Failed to load prompt '{filename}'")
-
+        # 3) Combine both errors if both failed
+        raise RuntimeError(
+            f"Failed to load prompt '{filename}' "
+            f"(package resources: {resource_error}; {candidate}: {e})"
+        ) from e
 
 
 if __name__ == '__main__':
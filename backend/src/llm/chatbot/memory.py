@@ -10,33 +10,37 @@ from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from openpyxl.descriptors import Typed
 from psycopg_pool import AsyncConnectionPool
 
-from src.database import get_async_db_pool
+from src.database import get_checkpoint_db_pool
 
-_already_set_up: bool = False
+_saver: AsyncPostgresSaver | InMemorySaver | None = None
+_setup_lock = asyncio.Lock()
 
 
 async def _get_saver() -> AsyncPostgresSaver | InMemorySaver:
-    pool = await get_async_db_pool()
+    pool = await get_checkpoint_db_pool()
     if isinstance(pool, AsyncConnectionPool):
         return AsyncPostgresSaver(conn=pool)
     else:
         return InMemorySaver()
 
 async def ensure_setup():
-    global _already_set_up
-
-    if _already_set_up:
-        return
-    _already_set_up = True
-    saver = await _get_saver()
-    if isinstance(saver, AsyncPostgresSaver):
-        await saver.setup()
+    await get_chat_postgres_saver_async()
 
 async def get_chat_postgres_saver_async() -> AsyncPostgresSaver:
     """
     Asynchronous PostgresSaver using a shared asyncpg pool.
     Reuses the pool for performance and connection safety.
+    The saver is created and set up once; concurrent first callers wait
+    on the lock so none of them gets a saver before setup() has finished.
     """
-    await ensure_setup()
-    return await _get_saver()
-
+    global _saver
+
+    if _saver is not None:
+        return _saver
+    async with _setup_lock:
+        if _saver is None:
+            saver = await _get_saver()
+            if isinstance(saver, AsyncPostgresSaver):
+                await saver.setup()
+            _saver = saver
+    return _saver
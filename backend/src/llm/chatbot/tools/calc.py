@@ -1,43 +1,41 @@
 import ast
-import operator as op
+from functools import lru_cache
 from langchain.tools import tool
 
-_allowed_operators: dict[type[op], callable] = {
-    ast.Add: op.add,
-    ast.Sub: op.sub,
-    ast.Mult: op.mul,
-    ast.Div: op.truediv,
-    ast.Pow: op.pow,
-    ast.Mod: op.mod,
-    ast.USub: op.neg,
-    ast.UAdd: op.pos,
-}
+_allowed_operators: frozenset[type[ast.AST]] = frozenset({
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.Pow,
+    ast.Mod,
+    ast.USub,
+    ast.UAdd,
+})
 
-def _safe_eval(node):
-    if isinstance(node, ast.Expression):
-        return _safe_eval(node.body)
-    if isinstance(node, ast.Constant):  # Python 3.8+
-        if isinstance(node.value, (int, float)):
-            return node.value
-        raise ValueError("Only numeric constants are allowed")
-    if isinstance(node, ast.BinOp):
-        left = _safe_eval(node.left)
-        right = _safe_eval(node.right)
-        op_type = type(node.op)
-        if op_type in _allowed_operators:
-            return _allowed_operators[op_type](left, right)
-        raise ValueError(f"Operator {op_type} not allowed")
-    if isinstance(node, ast.UnaryOp):
-        operand = _safe_eval(node.operand)
-        op_type = type(node.op)
-        if op_type in _allowed_operators:
-            return _allowed_operators[op_type](operand)
-        raise ValueError(f"Unary operator {op_type} not allowed")
-    raise ValueError("Unsupported expression")
+def _validate(parsed: ast.Expression) -> None:
+    """Reject anything other than numeric constants combined with allowed operators."""
+    for node in ast.walk(parsed):
+        if isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp)):
+            continue
+        if isinstance(node, ast.Constant):  # Python 3.8+
+            if isinstance(node.value, (int, float)):
+                continue
+            raise ValueError("Only numeric constants are allowed")
+        if isinstance(node, (ast.operator, ast.unaryop)):
+            if type(node) in _allowed_operators:
+                continue
+            raise ValueError(f"Operator {type(node)} not allowed")
+        raise ValueError("Unsupported expression")
 
+@lru_cache(maxsize=512)
 def _calc_body(expr: str) -> str:
     parsed = ast.parse(expr, mode="eval")
-    val = _safe_eval(parsed)
+    _validate(parsed)
+    # The tree is only numbers and arithmetic, so let the bytecode
+    # interpreter evaluate it instead of walking it in Python
+    code = compile(parsed, "<calc>", "eval")
+    val = eval(code, {"__builtins__": {}}, {})
     return str(val)
 
 @tool
@@ -47,6 +45,8 @@ def calc(expr: str) -> str:
     Example: calc("2*(3+4)**2")
     """
     try:
-        return _calc_body(expr)
+        # Surrounding whitespace is not meaningful (and leading whitespace is
+        # an IndentationError), so strip it before it becomes the cache key
+        return _calc_body(expr.strip())
     except Exception as e:
         return f"Error evaluating expression: {e}"
\ No newline at end of file
@@ -1,6 +1,9 @@
 from functools import wraps
 from langchain_core.tools import tool, BaseTool
 
+# {id(tool): (tool, innermost wrapped function)}
+_unwrap_cache: dict[int, tuple[object, callable]] = {}
+
 
 class ToolContextHandler:
     """
@@ -10,26 +13,38 @@ class ToolContextHandler:
     - Regular tools: Execute immediately
     """
     DECORATOR_KEY = "__decorator_key"
+    FLAGS_ATTR = "__tool_flags"
 
-    # Class variable to store decorator registrations
-    # Structure: {decorator_name: {function_name1, function_name2, ...}}
-    _decorator_registry: dict[str, set[str]] = {}
+    # Bit assigned to each decorator created by `tool_marker`
+    # Structure: {decorator_name: bit}
+    _decorator_bits: dict[str, int] = {}
 
     def __init__(self, tools: list[BaseTool]):
         self.tools_map = {t.name: self.get_actual_func(t) for t in tools}
+        # Decorator bitmask per tool, resolved once so checks are a single AND
+        self._flags_map: dict[str, int] = {
+            name: getattr(func, self.FLAGS_ATTR, 0) for name, func in self.tools_map.items()
+        }
 
     def has_decorator(self, tool_name: str, _decorator: callable) -> bool:
-        decorator_key: str = self.get_decorator_key(_decorator)
-        return tool_name in self._decorator_registry.get(decorator_key, set())
+        return bool(self._flags_map.get(tool_name, 0) & self.get_decorator_bit(_decorator))
 
     @staticmethod
     def get_actual_func(func: BaseTool):
-        while hasattr(func, "func"):
-            func = func.func
-        return func
+        # Tools are module-level singletons, so each one is unwrapped once.
+        # The entry keeps the tool itself to guard against id() reuse.
+        cached = _unwrap_cache.get(id(func))
+        if cached is not None and cached[0] is func:
+            return cached[1]
+
+        actual = func
+        while hasattr(actual, "func"):
+            actual = actual.func
+        _unwrap_cache[id(func)] = (func, actual)
+        return actual
 
     @staticmethod
-    def get_decorator_key(_decorator: callable) -> str:
+    def get_decorator_bit(_decorator: callable) -> int:
         try:
             return getattr(_decorator, ToolContextHandler.DECORATOR_KEY)
         except AttributeError:
@@ -38,23 +53,21 @@ class ToolContextHandler:
     @staticmethod
     def tool_marker(attr_name: str) -> callable:
         """
-        Factory that creates decorators which register a function name
-        in the decorator registry without modifying the function.
+        Factory that creates decorators which set a flag bit on the function
+        without otherwise modifying it.
         """
+        bits = ToolContextHandler._decorator_bits
+        bit = bits.setdefault(attr_name, 1 << len(bits))
 
         def _decorator(func: callable) -> callable:
-            # Get the function name
-            func_name = func.__name__
-
-            # Register this function under this decorator
-            if attr_name not in ToolContextHandler._decorator_registry:
-                ToolContextHandler._decorator_registry[attr_name] = set()
-            ToolContextHandler._decorator_registry[attr_name].add(func_name)
+            # Mark this function with this decorator's bit
+            flags = getattr(func, ToolContextHandler.FLAGS_ATTR, 0)
+            setattr(func, ToolContextHandler.FLAGS_ATTR, flags | bit)
 
             # Return the function unchanged
             return func
 
-        setattr(_decorator, ToolContextHandler.DECORATOR_KEY, attr_name)
+        setattr(_decorator, ToolContextHandler.DECORATOR_KEY, bit)
         return _decorator
 
 class ToolReg:
@@ -84,8 +97,8 @@ if __name__ == '__main__':
 
 
     def main():
-        print("=== Decorator Registry ===")
-        print(ToolContextHandler._decorator_registry)
+        print("=== Decorator Bits ===")
+        print(ToolContextHandler._decorator_bits)
 
         print("\n=== Using ToolContextHandler ===")
         handler = ToolContextHandler([util_sync, util_async])
@@ -1,23 +1,50 @@
+import importlib.util
 import os
+from functools import lru_cache
+from typing import AsyncIterator
 
+import httpx
 from dotenv import load_dotenv
 from langchain_core.runnables import RunnableWithFallbacks, Runnable
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, BaseMessage, ToolMessage
 from langchain_openai import ChatOpenAI
 from langchain_google_genai import ChatGoogleGenerativeAI
 import asyncio
+import hashlib
+from contextlib import aclosing
 import random
 import json
 import re
+import time
+import orjson
+from cachetools import TTLCache
 from pydantic import BaseModel
-from src.config import GEMINI_API_LIST, OPENAI_API_LIST, GEMINI_MODEL_NAME, OPENAI_MODEL_NAME
+from src.config import GEMINI_API_LIST, OPENAI_API_LIST, GEMINI_MODEL_NAME, OPENAI_MODEL_NAME, LLM_RACE_WIDTH
 
 # to mute gemini "ALTS creds ignored. Not running on GCP and untrusted ALTS is not enabled."
 os.environ['GRPC_VERBOSITY'] = 'NONE'
 
+# The closing fence is optional: a streamed reply may be cut right after the JSON
+_JSON_FENCE_RE = re.compile(r'^\s*```json\s*([\s\S]*?)\s*(?:```\s*)?$')
+_JSON_STRUCTURE_RE = re.compile(r'[{}\[\]"\\]')
+
 MessagesType = None | str | dict | BaseMessage | list[str, dict, BaseMessage]
 
 
+@lru_cache(maxsize=1)
+def _shared_http_client() -> httpx.AsyncClient:
+    """
+    One keep-alive connection pool for every OpenAI key, so a key's first
+    request reuses an open connection instead of paying TCP + TLS setup.
+    """
+    return httpx.AsyncClient(
+        # HTTP/2 multiplexes concurrent requests over one connection when h2 is installed
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    )
+
+
 class LLMConfig:
     """Stores configuration for creating an LLM instance"""
 
@@ -25,10 +52,31 @@ class LLMConfig:
         self.provider = provider  # "openai" or "gemini"
         self.api_key = api_key
         self.model = model
+        # Chat model clients are reusable, so keep one per parameter set
+        # (this also keeps their HTTP connection pools warm)
+        self._runnable_cache: dict[tuple, Runnable] = {}
+        # Routing health, maintained by RotatingLLM.send_message
+        self.in_flight: int = 0
+        self.ewma_latency_ms: float = 0.0
+        self.open_until: float = 0.0
 
     def create_runnable(self, temperature: float = 0.7, **kwargs) -> Runnable:
-        """Create a runnable with specified parameters"""
+        """Get the runnable for the specified parameters, creating it on first use"""
+        try:
+            key = (temperature, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            # Unhashable kwargs; build an uncached instance
+            return self._build_runnable(temperature, **kwargs)
+
+        runnable = self._runnable_cache.get(key)
+        if runnable is None:
+            runnable = self._runnable_cache[key] = self._build_runnable(temperature, **kwargs)
+        return runnable
+
+    def _build_runnable(self, temperature: float, **kwargs) -> Runnable:
         if self.provider == "openai":
+            kwargs.setdefault("http_async_client", _shared_http_client())
             return ChatOpenAI(
                 model=self.model,
                 api_key=self.api_key,
@@ -49,15 +97,234 @@ class LLMConfig:
         return f"{self.provider.capitalize()} ({self.model}) {{api=...{self.api_key[-10:]}}}"
 
 
+# Exception class names providers use for HTTP 429 (openai, google.api_core)
+_RATE_LIMIT_ERRORS = frozenset({"RateLimitError", "ResourceExhausted"})
+_MAX_BACKOFF_SECONDS = 30.0
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return (
+        type(e).__name__ in _RATE_LIMIT_ERRORS
+        or getattr(e, "status_code", None) == 429
+        or getattr(e, "code", None) == 429
+    )
+
+
+def _retry_after(e: Exception) -> float | None:
+    """Seconds the provider asked us to wait, from the Retry-After headers of the error's response"""
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if (ms := headers.get("retry-after-ms")) is not None:
+            return float(ms) / 1000
+        if (seconds := headers.get("retry-after")) is not None:
+            return float(seconds)
+    except ValueError:
+        # HTTP-date form; fall back to backoff
+        pass
+    return None
+
+
+class _JsonEndScanner:
+    """
+    Finds where the first top-level JSON object or array ends in streamed text.
+
+    Only brackets, quotes and backslashes are inspected (via regex), so feeding
+    a chunk costs a C-level scan rather than a Python loop over every character.
+    """
+
+    def __init__(self):
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> int:
+        """Feed the next chunk; return the offset just past the closing bracket, or -1"""
+        pos = 0
+        if self._escaped and chunk:
+            # The first character was escaped by a backslash ending the previous chunk
+            pos = 1
+            self._escaped = False
+
+        skip_to = pos
+        for match in _JSON_STRUCTURE_RE.finditer(chunk, pos):
+            i = match.start()
+            if i < skip_to:
+                continue
+            ch = chunk[i]
+            if self._in_string:
+                if ch == "\\":
+                    if i + 1 == len(chunk):
+                        self._escaped = True
+                    skip_to = i + 2
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self._started
+            elif ch in "{[":
+                self._depth += 1
+                self._started = True
+            elif ch in "}]" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    return i + 1
+        return -1
+
+
+class _JsonItemScanner:
+    """
+    Picks the objects of a streamed JSON array out of the text as soon as each one
+    closes: the array under `key` of a top-level object (e.g. each item of
+    {"evidence": [...]}), or a bare top-level array.
+
+    Uses the same regex scan as _JsonEndScanner; `done` is set once that array
+    (or the top-level value) ends, and `found` once the array has opened.
+    """
+
+    def __init__(self, key: str):
+        self._key = key
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        # Text of the string being read directly inside the top-level object;
+        # the last one read before a "[" is that array's key
+        self._key_parts: list[str] | None = None
+        self._last_key: str | None = None
+        # Stack depth inside the target array, 0 until it opens
+        self._item_depth = 0
+        self._item_parts: list[str] = []
+        self._in_item = False
+        self.done = False
+
+    @property
+    def found(self) -> bool:
+        return self._item_depth > 0
+
+    def feed(self, chunk: str) -> list[str]:
+        """Feed the next chunk; return the raw text of every item completed by it"""
+        items = []
+        pos = 0
+        if self._escaped and chunk:
+            # The first character was escaped by a backslash ending the previous chunk
+            pos = 1
+            self._escaped = False
+
+        item_start = 0 if self._in_item else -1
+        key_start = 0
+        skip_to = pos
+        for match in _JSON_STRUCTURE_RE.finditer(chunk, pos):
+            i = match.start()
+            if i < skip_to or self.done:
+                continue
+            ch = chunk[i]
+            if self._in_string:
+                if ch == "\\":
+                    if i + 1 == len(chunk):
+                        self._escaped = True
+                    skip_to = i + 2
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_parts is not None:
+                        self._key_parts.append(chunk[key_start:i])
+                        self._last_key = "".join(self._key_parts)
+                        self._key_parts = None
+            elif ch == '"':
+                self._in_string = bool(self._stack)
+                if len(self._stack) == 1 and self._stack[0] == "{":
+                    self._key_parts = []
+                    key_start = i + 1
+            elif ch in "{[":
+                if ch == "{" and self._item_depth and len(self._stack) == self._item_depth:
+                    self._in_item = True
+                    item_start = i
+                self._stack.append(ch)
+                if ch == "[" and not self._item_depth and (
+                        len(self._stack) == 1
+                        or (len(self._stack) == 2 and self._stack[0] == "{" and self._last_key == self._key)
+                ):
+                    self._item_depth = len(self._stack)
+            elif ch in "}]" and self._stack:
+                self._stack.pop()
+                if self._in_item and len(self._stack) == self._item_depth:
+                    self._item_parts.append(chunk[item_start:i + 1])
+                    items.append("".join(self._item_parts))
+                    self._item_parts.clear()
+                    self._in_item = False
+                elif len(self._stack) < self._item_depth or not self._stack:
+                    self.done = True
+
+        if self._in_item:
+            self._item_parts.append(chunk[item_start:])
+        if self._key_parts is not None:
+            self._key_parts.append(chunk[key_start:])
+        return items
+
+
+class LLMCache:
+    """
+    Exact-match cache for deterministic (temperature 0) LLM responses.
+
+    Lookups and stores never await, so the cache needs no lock under asyncio.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = 3600):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def cache_key(
+            model: tuple[str, ...],
+            messages: list[BaseMessage] | None,
+            temperature: float,
+            **llm_kwargs
+    ) -> str | None:
+        """Key for a request, or None when the response is not deterministic and must not be cached"""
+        if temperature > 0:
+            return None
+        payload = {
+            "model": model,
+            "messages": [(m.type, m.content) for m in messages or ()],
+            "temperature": temperature,
+            "kwargs": llm_kwargs,
+        }
+        try:
+            raw = json.dumps(payload, sort_keys=True)
+        except TypeError:
+            # Non-serializable kwargs (e.g. tool objects); skip caching
+            return None
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str | None) -> dict[str, any] | None:
+        if key is None:
+            return None
+        cached = self._cache.get(key)
+        # Callers add fields (e.g. "json") to the result, so hand out copies
+        return dict(cached) if cached is not None else None
+
+    def set(self, key: str | None, result: dict[str, any]):
+        if key is not None:
+            self._cache[key] = dict(result)
+
+
 class RotatingLLM:
     MAX_RETRIES = 2
 
-    def __init__(self, llm_configs: list[LLMConfig], cooldown_seconds: int = 60):
-        self.llm_configs: list[LLMConfig] = llm_configs
+    def __init__(self, llm_configs: list[LLMConfig], cooldown_seconds: int = 60, race_width: int = 1):
+        # Spread keys differently per process without mutating the caller's list
+        self.llm_configs: tuple[LLMConfig, ...] = tuple(random.sample(llm_configs, len(llm_configs)))
+        # Every rotation of the key order, built once so routing never copies
+        self._rotations: tuple[tuple[LLMConfig, ...], ...] = tuple(
+            self.llm_configs[i:] + self.llm_configs[:i] for i in range(len(self.llm_configs))
+        )
         self.cooldown_seconds = cooldown_seconds
+        self.race_width = race_width
         self._rotation_index = 0
-        self._lock = asyncio.Lock()
-        random.shuffle(self.llm_configs)
+        # Responses are cached per set of available models, not per key
+        self._model_family: tuple[str, ...] = tuple(sorted({
+            f"{config.provider}:{config.model}" for config in llm_configs
+        }))
+        self._cache = LLMCache()
 
     @staticmethod
     def _normalize_message(messages: [str, dict, BaseMessage]) -> BaseMessage:
@@ -88,10 +355,23 @@ class RotatingLLM:
             return [RotatingLLM._normalize_message(i) for i in messages]
         raise ValueError(f"Unsupported message type: {type(messages)}")
 
-    async def _rotate(self) -> list[LLMConfig]:
-        async with self._lock:
-            self.llm_configs = self.llm_configs[1:] + self.llm_configs[:1]
-            return self.llm_configs
+    def _route(self) -> list[LLMConfig]:
+        """
+        Order configs least-busy first: fewest requests in flight, with the
+        rotation breaking ties so idle keys still take turns. Configs whose
+        circuit is open (failed within the last cooldown_seconds) are skipped
+        unless every config is open.
+        """
+        # Nothing awaits between the read and the write, so under asyncio
+        # this is atomic without a lock
+        self._rotation_index = (self._rotation_index + 1) % len(self._rotations)
+        rotated = self._rotations[self._rotation_index]
+        now = time.monotonic()
+        candidates = [config for config in rotated if config.open_until <= now] or list(rotated)
+        # Stable sort, so the rotation still breaks ties. Latency is left out on
+        # purpose: it would pin every idle request to the fastest key
+        candidates.sort(key=lambda config: config.in_flight)
+        return candidates
 
     async def get_runnable(self, temperature: float = 0.7, **kwargs) -> RunnableWithFallbacks:
         """
@@ -101,7 +381,7 @@ class RotatingLLM:
         :param kwargs: Additional arguments to pass to LLM constructors
         :return: RunnableWithFallbacks instance
         """
-        ordered = await self._rotate()
+        ordered = self._route()
         runnables = [config.create_runnable(temperature=temperature, **kwargs) for config in ordered]
         primary, *fallbacks = runnables
         return RunnableWithFallbacks(runnable=primary, fallbacks=fallbacks)
@@ -109,13 +389,14 @@ class RotatingLLM:
     @staticmethod
     def try_get_json(text: str):
         try:
-            clean_text = re.sub(
-                r'^\s*```json\s*([\s\S]*?)\s*```\s*$',
-                r'\1',
-                text.strip(),
-            ).strip()
-            return json.loads(clean_text)
-        except json.JSONDecodeError:
+            clean_text = text.strip()
+            # Only pay for the regex when there is a fence to strip
+            if "```" in clean_text:
+                match = _JSON_FENCE_RE.match(clean_text)
+                if match:
+                    clean_text = match.group(1).strip()
+            return orjson.loads(clean_text)
+        except orjson.JSONDecodeError:
             return None
 
     async def send_message_get_json(
@@ -139,20 +420,27 @@ class RotatingLLM:
         result = []
 
         for i in range(retry):
-            result = await self.send_message(messages, config, temperature=temperature, **llm_kwargs)
+            # A cached response that failed to parse would fail again, so
+            # retries go to the LLM (and overwrite the cache on success)
+            result = await self.send_message(
+                messages, config, temperature=temperature, use_cache=(i == 0),
+                stop_after_json=True, **llm_kwargs
+            )
             parsed = RotatingLLM.try_get_json(result["text"])
             if parsed is None:
                 continue
             result["json"] = parsed
             return result
 
-        raise RuntimeError(f"Failed to parse json from LLM {json.dumps(result)}")
+        raise RuntimeError(f"Failed to parse json from LLM {orjson.dumps(result).decode()}")
 
     async def send_message(
             self,
             messages: [str, list[BaseMessage], dict[str, str]],
             config: dict | None = None,
             temperature: float = 0.0,
+            use_cache: bool = True,
+            stop_after_json: bool = False,
             **llm_kwargs
     ) -> dict[str, any]:
         """
@@ -161,27 +449,239 @@ class RotatingLLM:
         :param messages: the messages to send
         :param config: ainvoke's config
         :param temperature: Temperature for LLM generation
+        :param use_cache: Serve identical temperature 0 requests from the response cache
+        :param stop_after_json: Stop reading the reply once its first JSON object is complete
         :param llm_kwargs: Additional arguments to pass to LLM constructors
         :return: dict["text": raw response, "json": parsed json, "model": underlying model, "status": ok/fail]
         """
         msgs = self.format_messages(messages)
-        runnable: Runnable = await self.get_runnable(temperature=temperature, **llm_kwargs)
+        cache_key = LLMCache.cache_key(
+            self._model_family, msgs, temperature, stop_after_json=stop_after_json, **llm_kwargs
+        )
+        if use_cache:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
 
+        error: Exception | None = None
+        wait: float | None = None
         for attempt in range(self.MAX_RETRIES):
-            try:
-                result = await runnable.ainvoke(msgs, config=config)
-                text = result.content if hasattr(result, "content") else str(result)
-
-                return {
+            if attempt:
+                # Every config failed; back off (as long as a provider asked,
+                # otherwise exponentially with jitter) before the next pass
+                delay = wait if wait is not None else (2 ** attempt) * random.uniform(0.5, 1.5)
+                await asyncio.sleep(min(delay, _MAX_BACKOFF_SECONDS))
+
+            wait = None
+            # Fall back through the configs ourselves (rather than with
+            # RunnableWithFallbacks) so each one's health can be tracked,
+            # racing race_width of them at a time
+            configs = self._route()
+            for start in range(0, len(configs), self.race_width):
+                runnable, text, errors = await self._race(
+                    configs[start:start + self.race_width],
+                    msgs, config, temperature, stop_after_json, llm_kwargs
+                )
+                for e in errors:
+                    error = e
+                    if _is_rate_limited(e) and (retry_after := _retry_after(e)) is not None:
+                        wait = retry_after if wait is None else min(wait, retry_after)
+                if runnable is None:
+                    continue
+
+                result = {
                     "text": text,
                     "model": RotatingLLM._format_runnable(runnable),
                     "status": "ok",
                 }
+                self._cache.set(cache_key, result)
+                return result
 
+        return {"text": str(error), "status": "fail"}
+
+    async def stream_json_items(
+            self,
+            messages: [str, list[BaseMessage], dict[str, str]],
+            key: str = "evidence",
+            config: dict | None = None,
+            temperature: float = 0.0,
+            **llm_kwargs
+    ) -> AsyncIterator[dict[str, any]]:
+        """
+        Streams the reply and yields each object of its `key` array (e.g. the items
+        of {"evidence": [...]}, or of a bare top-level array) as soon as that object
+        is complete. When nothing could be picked out while streaming, the whole
+        reply is parsed instead.
+
+        Retries and falls through the configs like send_message, but only until the
+        first item is yielded, so a caller never receives the same item twice.
+
+        :param messages: the messages to send
+        :param key: field of the top-level object holding the array
+        :param config: astream's config
+        :param temperature: Temperature for LLM generation
+        :param llm_kwargs: Additional arguments to pass to LLM constructors
+        """
+        msgs = self.format_messages(messages)
+        error: Exception | None = None
+        wait: float | None = None
+
+        for attempt in range(self.MAX_RETRIES):
+            if attempt:
+                # Every config failed; back off exactly like send_message
+                delay = wait if wait is not None else (2 ** attempt) * random.uniform(0.5, 1.5)
+                await asyncio.sleep(min(delay, _MAX_BACKOFF_SECONDS))
+
+            wait = None
+            for llm_config in self._route():
+                runnable = llm_config.create_runnable(temperature=temperature, **llm_kwargs)
+                scanner = _JsonItemScanner(key)
+                parts: list[str] = []
+                yielded = False
+                llm_config.in_flight += 1
+                started = time.monotonic()
+                try:
+                    async with aclosing(runnable.astream(msgs, config=config)) as stream:
+                        async for chunk in stream:
+                            content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                            parts.append(content)
+                            for raw in scanner.feed(content):
+                                try:
+                                    item = orjson.loads(raw)
+                                except orjson.JSONDecodeError:
+                                    continue
+                                yielded = True
+                                yield item
+                            if scanner.done:
+                                break
+                except Exception as e:
+                    self._record_failure(llm_config, e)
+                    if yielded:
+                        raise
+                    error = e
+                    if _is_rate_limited(e) and (retry_after := _retry_after(e)) is not None:
+                        wait = retry_after if wait is None else min(wait, retry_after)
+                    continue
+                finally:
+                    llm_config.in_flight -= 1
+
+                self._record_success(llm_config, started)
+                if yielded or (scanner.done and scanner.found):
+                    return
+
+                # Nothing was picked out while streaming; parse the whole reply
+                parsed = RotatingLLM.try_get_json("".join(parts))
+                if isinstance(parsed, dict):
+                    items = parsed.get(key)
+                    items = items if isinstance(items, list) else []
+                elif isinstance(parsed, list):
+                    items = parsed
+                else:
+                    error = ValueError("LLM reply contained no JSON")
+                    continue
+                for item in items:
+                    if isinstance(item, dict):
+                        yield item
+                return
+
+        raise RuntimeError(f"Failed to stream json from LLM: {error}")
+
+    async def _race(
+            self,
+            llm_configs: list[LLMConfig],
+            msgs: list[BaseMessage] | None,
+            config: dict | None,
+            temperature: float,
+            stop_after_json: bool,
+            llm_kwargs: dict
+    ) -> tuple[Runnable | None, str | None, list[Exception]]:
+        """
+        Send the request to every config at once and keep the first successful reply,
+        cancelling the rest. Returns (runnable, text, errors); runnable is None if all failed.
+        """
+        args = (msgs, config, temperature, stop_after_json, llm_kwargs)
+        if len(llm_configs) == 1:
+            try:
+                return (*await self._invoke(llm_configs[0], *args), [])
             except Exception as e:
-                if attempt == self.MAX_RETRIES - 1:
-                    return {"text": str(e), "status": "fail"}
-                continue
+                return None, None, [e]
+
+        tasks = [asyncio.create_task(self._invoke(llm_config, *args)) for llm_config in llm_configs]
+        errors = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    runnable, text = await next_done
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                return runnable, text, errors
+            return None, None, errors
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _invoke(
+            self,
+            llm_config: LLMConfig,
+            msgs: list[BaseMessage] | None,
+            config: dict | None,
+            temperature: float,
+            stop_after_json: bool,
+            llm_kwargs: dict
+    ) -> tuple[Runnable, str]:
+        """Run the request on one config, updating its load, latency and circuit state"""
+        runnable = llm_config.create_runnable(temperature=temperature, **llm_kwargs)
+        llm_config.in_flight += 1
+        started = time.monotonic()
+        try:
+            text = await self._stream_text(runnable, msgs, config, stop_after_json)
+        # Losing a race raises CancelledError, which is not an Exception and
+        # so never opens the key's circuit
+        except Exception as e:
+            self._record_failure(llm_config, e)
+            raise
+        finally:
+            llm_config.in_flight -= 1
+
+        self._record_success(llm_config, started)
+        return runnable, text
+
+    def _record_failure(self, llm_config: LLMConfig, e: Exception):
+        """Open the config's circuit after a failed request"""
+        cooldown = self.cooldown_seconds
+        if _is_rate_limited(e) and (retry_after := _retry_after(e)) is not None:
+            # Rate limited: the key is usable again exactly when the provider says
+            cooldown = retry_after
+        llm_config.open_until = time.monotonic() + cooldown
+
+    @staticmethod
+    def _record_success(llm_config: LLMConfig, started: float):
+        """Fold the request's latency into the config's average and close its circuit"""
+        latency_ms = (time.monotonic() - started) * 1000
+        llm_config.ewma_latency_ms = 0.8 * llm_config.ewma_latency_ms + 0.2 * latency_ms
+        llm_config.open_until = 0.0
+
+    @staticmethod
+    async def _stream_text(
+            runnable: Runnable,
+            msgs: list[BaseMessage] | None,
+            config: dict | None,
+            stop_after_json: bool
+    ) -> str:
+        """Stream the reply, optionally closing the stream as soon as the JSON object is complete"""
+        parts = []
+        scanner = _JsonEndScanner() if stop_after_json else None
+        async with aclosing(runnable.astream(msgs, config=config)) as stream:
+            async for chunk in stream:
+                content = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if scanner is not None:
+                    end = scanner.feed(content)
+                    if end >= 0:
+                        parts.append(content[:end])
+                        break
+                parts.append(content)
+        return "".join(parts)
 
     @staticmethod
     def create_instance_with_env():
@@ -199,7 +699,7 @@ class RotatingLLM:
                 LLMConfig(provider="openai", api_key=key, model=OPENAI_MODEL_NAME)
             )
 
-        return RotatingLLM(llm_configs)
+        return RotatingLLM(llm_configs, race_width=LLM_RACE_WIDTH)
 
     @staticmethod
     def _format_runnable(runnable: Runnable) -> str:
@@ -67,40 +67,42 @@ print(f"Feature names: {feature_names}\n")
 # Create SHAP explainer
 explainer = shap.TreeExplainer(model.named_steps['classifier'])
 
+# Run every test case through the pipeline and SHAP in one batch
+input_df = pd.DataFrame(test_cases)
+
+# Add derived feature
+if 'loan_amnt' in input_df.columns and 'person_income' in input_df.columns:
+    input_df['loan_percent_income'] = input_df['loan_amnt'] / input_df['person_income']
+
+# Get preprocessed data
+preprocessed_data = preprocessor.transform(input_df)
+
+# Get SHAP values (one row per test case)
+shap_values = explainer.shap_values(preprocessed_data, check_additivity=False)
+if isinstance(shap_values, list):
+    shap_values = shap_values[1]
+elif shap_values.ndim == 3:
+    # (samples, features, classes)
+    shap_values = shap_values[:, :, 1]
+shap_values = np.atleast_2d(shap_values)
+
+# Get predictions
+probs = model.predict_proba(input_df)
+preds = model.classes_[probs.argmax(axis=1)]
+
 for i, test_case in enumerate(test_cases, 1):
     print(f"\n{'='*80}")
     print(f"TEST CASE {i}:")
     print(f"{'='*80}")
     
-    input_df = pd.DataFrame([test_case])
-    
-    # Add derived feature
-    if 'loan_amnt' in input_df.columns and 'person_income' in input_df.columns:
-        input_df['loan_percent_income'] = input_df['loan_amnt'] / input_df['person_income']
-    
     print(f"\nInput:")
     for key, val in test_case.items():
         print(f"  {key}: {val}")
-    print(f"  loan_percent_income: {input_df['loan_percent_income'].iloc[0]:.4f}")
-    
-    # Get preprocessed data
-    preprocessed_data = preprocessor.transform(input_df)
-    
-    # Get SHAP values
-    shap_values = explainer.shap_values(preprocessed_data)
-    if isinstance(shap_values, list):
-        shap_values = shap_values[1]
-    
-    if len(shap_values.shape) > 1:
-        sample_shap_values = shap_values[0]
-    else:
-        sample_shap_values = shap_values
-    
-    sample_shap_values = np.atleast_1d(sample_shap_values).flatten()
+    print(f"  loan_percent_income: {input_df['loan_percent_income'].iloc[i - 1]:.4f}")
     
-    # Get prediction
-    pred = model.predict(input_df)[0]
-    prob = model.predict_proba(input_df)[0, 1]
+    sample_shap_values = shap_values[i - 1]
+    pred = preds[i - 1]
+    prob = probs[i - 1, 1]
     
     print(f"\nPrediction: {pred} (Probability: {prob:.4f})")
     print(f"\nTop 10 SHAP values:")
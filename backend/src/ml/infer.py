@@ -1,4 +1,6 @@
+import functools
 import joblib
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import os
 import shap
@@ -10,34 +12,222 @@ def load_model():
     model_path = os.path.join(os.path.dirname(__file__), 'models', 'loan_model.joblib')
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at {model_path}. Please run train.py first.")
-    return joblib.load(model_path)
+    # mmap the pipeline's numpy arrays instead of copying them into each worker
+    return joblib.load(model_path, mmap_mode='r')
 
-def explain_prediction(input_data: pd.DataFrame, model) -> str:
+@functools.lru_cache(maxsize=1)
+def _get_model():
+    """Load the model once per process and reuse it for every prediction."""
+    return load_model()
+
+def warm_model() -> None:
+    """Load the model into this process's cache ahead of the first prediction."""
+    _get_model()
+
+@functools.lru_cache(maxsize=1)
+def get_inference_executor() -> ThreadPoolExecutor:
+    """
+    Threads reserved for model inference, so predictions never queue behind
+    unrelated blocking work on the event loop's default executor.
+    """
+    return ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ml-infer")
+
+@functools.lru_cache(maxsize=1)
+def _get_feature_order() -> tuple[str, ...]:
+    """Column order the pipeline was fitted with."""
+    return tuple(_get_model().feature_names_in_)
+
+def _ratio(numerator, denominator) -> float:
+    """Divide like pandas does: missing values give NaN and dividing by zero gives inf (or NaN for 0/0)."""
+    if numerator is None or denominator is None:
+        return np.nan
+    try:
+        return numerator / denominator
+    except ZeroDivisionError:
+        if numerator == 0 or np.isnan(numerator):
+            return np.nan
+        return np.copysign(np.inf, numerator)
+
+@functools.lru_cache(maxsize=1)
+def _get_row_builder():
+    """
+    Generate a function that lays a dict out as a tuple in training column order.
+    The column lookups are unrolled at load time, so building a row runs no loop.
+    """
+    columns = _get_feature_order()
+    # loan_percent_income is derived in place (when its inputs are present)
+    # so callers never copy the dict to add it
+    derived = {
+        'loan_percent_income': (
+            "(ratio(d['loan_amnt'], d['person_income']) "
+            "if 'loan_amnt' in d and 'person_income' in d else get('loan_percent_income'))"
+        ),
+    }
+    source = (
+        "def _build(d):\n    get = d.get\n    return ("
+        + "".join(f"{derived.get(col, f'get({col!r})')}, " for col in columns)
+        + ")\n"
+    )
+    namespace = {"ratio": _ratio}
+    exec(compile(source, "<infer row builder>", "exec"), namespace)
+    return namespace["_build"]
+
+@functools.lru_cache(maxsize=1)
+def _get_column_groups() -> tuple[list[str], list[str]]:
+    """Numerical and categorical columns as routed by the fitted ColumnTransformer."""
+    preprocessor = _get_model().named_steps['preprocessor']
+    columns = {name: list(cols) for name, _, cols in preprocessor.transformers_}
+    return columns['num'], columns['cat']
+
+def _cast_dtypes(input_data: pd.DataFrame) -> pd.DataFrame:
+    """Narrow numeric columns to float32 and categorical ones to category before preprocessing."""
+    numeric_cols, categorical_cols = _get_column_groups()
+    input_data[numeric_cols] = input_data[numeric_cols].astype(np.float32, copy=False)
+    input_data[categorical_cols] = input_data[categorical_cols].astype('category')
+    return input_data
+
+def _build_frame(rows: list[dict]) -> pd.DataFrame:
+    """
+    Build an input frame straight from dicts in training column order.
+    The ColumnTransformer selects columns by name, so a DataFrame is still
+    required, but this skips pandas' record-oriented constructor.
+    """
+    columns = _get_feature_order()
+    build_row = _get_row_builder()
+    values = np.empty((len(rows), len(columns)), dtype=object)
+    for i, row in enumerate(rows):
+        values[i] = build_row(row)
+    return _cast_dtypes(pd.DataFrame(values, columns=columns))
+
+def _predict_frame(model, input_data) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Run the pipeline once and derive the class label from the probabilities.
+    Picking classes_ by argmax is exactly what model.predict does internally,
+    so labels (and ties) match without a second transform + forward pass.
+    model may also be the bare classifier given already-preprocessed data.
+    """
+    proba = model.predict_proba(input_data)
+    probability = np.ascontiguousarray(proba[:, 1])
+    prediction = model.classes_[proba.argmax(axis=1)]
+    return prediction, probability
+
+# Numerical columns in the order the preprocessor emits them
+_NUMERICAL_COLS = ('person_age', 'person_income', 'person_emp_length',
+                   'loan_amnt', 'loan_int_rate', 'loan_percent_income',
+                   'cb_person_cred_hist_length')
+
+# Readable name mappings
+_NUMERICAL_READABLE = {
+    'person_age': 'Age',
+    'person_income': 'Income',
+    'person_emp_length': 'Employment Length',
+    'loan_amnt': 'Loan Amount',
+    'loan_int_rate': 'Interest Rate',
+    'loan_percent_income': 'Loan/Income Ratio',
+    'cb_person_cred_hist_length': 'Credit History Length'
+}
+
+_CATEGORICAL_READABLE = {
+    'RENT': 'Renting home',
+    'OWN': 'Owning home',
+    'MORTGAGE': 'Home with mortgage',
+    'OTHER': 'Other housing',
+    'DEBTCONSOLIDATION': 'Debt consolidation loan',
+    'EDUCATION': 'Education loan',
+    'HOMEIMPROVEMENT': 'Home improvement loan',
+    'MEDICAL': 'Medical loan',
+    'PERSONAL': 'Personal loan',
+    'VENTURE': 'Business venture loan',
+    'A': 'Grade A loan',
+    'B': 'Grade B loan',
+    'C': 'Grade C loan',
+    'D': 'Grade D loan',
+    'E': 'Grade E loan',
+    'F': 'Grade F loan',
+    'G': 'Grade G loan',
+    'N': 'No default history',
+    'Y': 'Previous default'
+}
+
+@functools.lru_cache(maxsize=1)
+def _get_feature_names(preprocessor) -> tuple[str, ...]:
+    """Names of the preprocessed features: numerical columns, then the one-hot categories."""
+    feature_names = list(_NUMERICAL_COLS)
+
+    # Get categorical feature names from one-hot encoder
+    cat_features = preprocessor.named_transformers_['cat']
+    if hasattr(cat_features.named_steps['onehot'], 'get_feature_names_out'):
+        feature_names.extend(cat_features.named_steps['onehot'].get_feature_names_out())
+    return tuple(feature_names)
+
+@functools.lru_cache(maxsize=1)
+def _get_categorical_labels(preprocessor) -> tuple[tuple[str | None, ...], np.ndarray]:
+    """
+    Readable label for each one-hot feature (None for other features), plus a
+    mask of the features that have one.
+    """
+    labels = []
+    for idx, feature_name in enumerate(_get_feature_names(preprocessor)):
+        label = None
+        if idx >= len(_NUMERICAL_COLS) and feature_name.startswith('x') and '_' in feature_name:
+            category_value = feature_name.split('_', 1)[1]
+            label = _CATEGORICAL_READABLE.get(category_value, category_value.replace('_', ' ').title())
+        labels.append(label)
+    labelled = np.array([label is not None for label in labels], dtype=bool)
+    labelled.flags.writeable = False
+    return tuple(labels), labelled
+
+def _top_k(indices: np.ndarray, abs_impact: np.ndarray, k: int) -> np.ndarray:
+    """The k indices with the largest impact, largest first."""
+    if len(indices) > k:
+        indices = indices[np.argpartition(-abs_impact[indices], k - 1)[:k]]
+    return indices[np.argsort(-abs_impact[indices], kind='stable')]
+
+def _describe_numerical(orig_feature: str, value) -> str:
+    readable_name = _NUMERICAL_READABLE.get(orig_feature, orig_feature.replace('_', ' ').title())
+
+    if 'income' in orig_feature or 'amnt' in orig_feature:
+        feature_value_str = f" ${value:,.0f}"
+    elif 'rate' in orig_feature:
+        feature_value_str = f" {value:.1f}%"
+    elif 'percent' in orig_feature:
+        feature_value_str = f" {value:.1%}"
+    elif 'age' in orig_feature:
+        feature_value_str = f" {int(value)}"
+    elif 'length' in orig_feature:
+        feature_value_str = f" {value:.0f} years"
+    else:
+        feature_value_str = f"{value}"
+
+    return f"{readable_name}: {feature_value_str}"
+
+@functools.lru_cache(maxsize=1)
+def _get_explainer(classifier) -> shap.TreeExplainer:
+    """
+    Build the SHAP explainer once per fitted classifier. Construction walks
+    every tree to collect its node statistics, so it must not run per call.
+    """
+    return shap.TreeExplainer(classifier)
+
+def explain_prediction(input_data: pd.DataFrame, model, preprocessed_data=None) -> str:
     """
     Generate human-readable explanation for the prediction using SHAP.
     Returns top 2 feature contributions as a formatted string.
     Only shows features that are actually present in the input.
+    Pass preprocessed_data when the caller has already transformed input_data.
     """
     try:
         # Get the preprocessed data
         preprocessor = model.named_steps['preprocessor']
-        preprocessed_data = preprocessor.transform(input_data)
+        if preprocessed_data is None:
+            preprocessed_data = preprocessor.transform(input_data)
 
         # Build feature name mapping
-        numerical_cols = ['person_age', 'person_income', 'person_emp_length',
-                         'loan_amnt', 'loan_int_rate', 'loan_percent_income',
-                         'cb_person_cred_hist_length']
+        numerical_cols = _NUMERICAL_COLS
+        feature_names = _get_feature_names(preprocessor)
 
-        feature_names = numerical_cols.copy()
-
-        # Get categorical feature names from one-hot encoder
-        cat_features = preprocessor.named_transformers_['cat']
-        if hasattr(cat_features.named_steps['onehot'], 'get_feature_names_out'):
-            cat_feature_names = cat_features.named_steps['onehot'].get_feature_names_out()
-            feature_names.extend(cat_feature_names)
-
-        # Create SHAP explainer
-        explainer = shap.TreeExplainer(model.named_steps['classifier'])
+        # Reuse the SHAP explainer built for this classifier
+        explainer = _get_explainer(model.named_steps['classifier'])
         shap_values = explainer.shap_values(preprocessed_data)
 
         # For binary classification, use values for class 1 (default risk)
@@ -60,103 +250,34 @@ def explain_prediction(input_data: pd.DataFrame, model) -> str:
 
         original_values = input_data.iloc[0]
 
-        # Readable name mappings
-        numerical_readable = {
-            'person_age': 'Age',
-            'person_income': 'Income',
-            'person_emp_length': 'Employment Length',
-            'loan_amnt': 'Loan Amount',
-            'loan_int_rate': 'Interest Rate',
-            'loan_percent_income': 'Loan/Income Ratio',
-            'cb_person_cred_hist_length': 'Credit History Length'
-        }
-
-        categorical_readable = {
-            'RENT': 'Renting home',
-            'OWN': 'Owning home',
-            'MORTGAGE': 'Home with mortgage',
-            'OTHER': 'Other housing',
-            'DEBTCONSOLIDATION': 'Debt consolidation loan',
-            'EDUCATION': 'Education loan',
-            'HOMEIMPROVEMENT': 'Home improvement loan',
-            'MEDICAL': 'Medical loan',
-            'PERSONAL': 'Personal loan',
-            'VENTURE': 'Business venture loan',
-            'A': 'Grade A loan',
-            'B': 'Grade B loan',
-            'C': 'Grade C loan',
-            'D': 'Grade D loan',
-            'E': 'Grade E loan',
-            'F': 'Grade F loan',
-            'G': 'Grade G loan',
-            'N': 'No default history',
-            'Y': 'Previous default'
-        }
-
-        # Collect all valid features with their SHAP values
-        candidates = []
-
-        for idx in range(len(sample_shap_values)):
-            if idx >= len(feature_names):
-                continue
-
-            feature_name = feature_names[idx]
-            shap_value = sample_shap_values[idx]
-
-            # Skip features with negligible impact
-            if abs(shap_value) < 0.01:
-                continue
-
-            # Handle numerical features (first 7 features)
-            if idx < len(numerical_cols):
-                orig_feature = numerical_cols[idx]
-                readable_name = numerical_readable.get(orig_feature, orig_feature.replace('_', ' ').title())
-                value = original_values[orig_feature]
-
-                if 'income' in orig_feature or 'amnt' in orig_feature:
-                    feature_value_str = f" ${value:,.0f}"
-                elif 'rate' in orig_feature:
-                    feature_value_str = f" {value:.1f}%"
-                elif 'percent' in orig_feature:
-                    feature_value_str = f" {value:.1%}"
-                elif 'age' in orig_feature:
-                    feature_value_str = f" {int(value)}"
-                elif 'length' in orig_feature:
-                    feature_value_str = f" {value:.0f} years"
-                else:
-                    feature_value_str = f"{value}"
-
-                impact = float(shap_value)
-
-                candidates.append({
-                    'abs_impact': abs(impact),
-                    'text': f"{readable_name}: {feature_value_str}",
-                    'is_numerical': True
-                })
-
-            # Handle one-hot encoded categorical features - ONLY if they're active (value = 1)
-            elif feature_name.startswith('x') and '_' in feature_name:
-                # Check if this categorical feature is active in the preprocessed data
-                if idx < len(preprocessed_array) and preprocessed_array[idx] > 0.5:
-                    parts = feature_name.split('_', 1)
-                    if len(parts) == 2:
-                        category_value = parts[1]
-                        readable_name = categorical_readable.get(category_value,
-                                                                category_value.replace('_', ' ').title())
-
-                        impact = float(shap_value)
-
-                        candidates.append({
-                            'abs_impact': abs(impact),
-                            'text': f"{readable_name}",
-                            'is_numerical': False
-                        })
-
-        # Sort by: numerical features first, then by absolute impact
-        candidates.sort(key=lambda x: (-x['is_numerical'], -x['abs_impact']))
-
-        # Return top 2 explanations
-        explanations = [c['text'] for c in candidates[:2]]
+        # Only the first len(feature_names) values map onto named features
+        n_features = min(len(sample_shap_values), len(feature_names))
+        abs_impact = np.abs(sample_shap_values[:n_features])
+        # Skip features with negligible impact
+        significant = abs_impact >= 0.01
+
+        # Numerical features (first 7 features)
+        n_numerical = min(len(numerical_cols), n_features)
+        numerical_idx = np.flatnonzero(significant[:n_numerical])
+
+        # One-hot encoded categorical features - ONLY if they're active (value = 1)
+        labels, labelled = _get_categorical_labels(preprocessor)
+        n_active = min(len(preprocessed_array), n_features)
+        active = np.zeros(n_features, dtype=bool)
+        active[:n_active] = np.asarray(preprocessed_array[:n_active]) > 0.5
+        categorical_mask = significant & active & labelled[:n_features]
+        categorical_idx = np.flatnonzero(categorical_mask)
+
+        # Numerical features first, then by absolute impact; return top 2 explanations
+        top = _top_k(numerical_idx, abs_impact, 2)
+        if len(top) < 2:
+            top = np.concatenate([top, _top_k(categorical_idx, abs_impact, 2 - len(top))])
+
+        explanations = [
+            _describe_numerical(numerical_cols[idx], original_values[numerical_cols[idx]])
+            if idx < n_numerical else labels[idx]
+            for idx in top
+        ]
         return "; ".join(explanations) if explanations else "Standard risk assessment"
 
     except Exception as e:
@@ -168,30 +289,45 @@ def predict_loan_status(input_data: LoanApplication | dict | pd.DataFrame, inclu
     input_data: LoanApplication, dict or pd.DataFrame
     include_explanation: If True, returns explanation along with prediction
     """
-    model = load_model()
+    model = _get_model()
 
     if isinstance(input_data, LoanApplication):
         input_data = input_data.model_dump()
 
     if isinstance(input_data, dict):
-        input_data = pd.DataFrame([input_data])
-
-    # Ensure consistency of derived features
-    if 'loan_amnt' in input_data.columns and 'person_income' in input_data.columns:
-        input_data['loan_percent_income'] = input_data['loan_amnt'] / input_data['person_income']
+        input_data = _build_frame([input_data])
+    else:
+        # Ensure consistency of derived features
+        if 'loan_amnt' in input_data.columns and 'person_income' in input_data.columns:
+            input_data['loan_percent_income'] = input_data['loan_amnt'] / input_data['person_income']
+        input_data = _cast_dtypes(input_data)
 
     # Ensure columns match training data (order doesn't matter for ColumnTransformer usually, but good practice)
     # The model pipeline handles preprocessing
 
-    prediction = model.predict(input_data)
-    probability = model.predict_proba(input_data)[:, 1]
-
     if include_explanation:
-        explanation = explain_prediction(input_data, model)
+        # Preprocess once and share it between the classifier and SHAP
+        preprocessed_data = model.named_steps['preprocessor'].transform(input_data)
+        prediction, probability = _predict_frame(model.named_steps['classifier'], preprocessed_data)
+        explanation = explain_prediction(input_data, model, preprocessed_data)
         return prediction, probability, explanation
 
+    prediction, probability = _predict_frame(model, input_data)
     return prediction, probability
 
+def predict_batch(rows: list[LoanApplication | dict]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Predict loan status for many applications in a single pipeline pass.
+    rows: list of LoanApplication or dict
+    Returns (prediction, probability) arrays aligned with rows.
+    """
+    model = _get_model()
+    input_data = _build_frame([
+        row.model_dump() if isinstance(row, LoanApplication) else row
+        for row in rows
+    ])
+    return _predict_frame(model, input_data)
+
 if __name__ == '__main__':
     # Sample input based on train.csv structure
     sample_input = {
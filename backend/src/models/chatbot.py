@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, ConfigDict
 
 
 class Action(BaseModel):
@@ -12,6 +12,8 @@ class Action(BaseModel):
 
 
 class ChatResponse(BaseModel):
+    model_config = ConfigDict(ser_json_bytes="base64")
+
     thread_id: str
     text: str
     meta: dict[str, Any] = {}
@@ -29,18 +31,22 @@ class SendMessage(BaseModel):
 class ConfirmAction(BaseModel):
     thread_id: str
     approved: bool
+    current_user: int | None = None
 
 class AttachContent(BaseModel):
     thread_id: str
     content: str                     # Base64 content for images/files, or plain text
     content_type: str = "image"      # 'file', 'image', or 'text'
     mime_type: str | None = None     # Required for 'file' type (e.g., 'application/pdf')
+    current_user: int | None = None
 
 
 class ClearMemory(BaseModel):
     thread_id: str
+    current_user: int | None = None
 
 
 class ContinueWithToolResult(BaseModel):
     thread_id: str
     text: str
+    current_user: int | None = None
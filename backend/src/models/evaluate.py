@@ -1,6 +1,4 @@
-from typing import Any
-
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel
 from src.models.session import TextContent, UserProfile, EvaluationEvidence
 
 
@@ -1,24 +1,47 @@
 from pydantic import BaseModel, Field, create_model
+from functools import lru_cache
 from typing import Optional
-import pandas as pd
-import joblib
+import os
 from pydantic.fields import FieldInfo
 
 from src import config
 
-# Load the final feature list saved earlier
-features = joblib.load(fr"{config.ROOT}\ml_models\model_features.pkl")
-
-fields = {
-    feature: (Optional[float], Field(default=None))
-    for feature in features
-}
-
-CreditModelInput = create_model(
-    "CreditModelInput",
-    **fields
-)
-for i in CreditModelInput.model_fields.items():
-    key: str = i[0]
-    val: FieldInfo = i[1]
-    print(f"{key}: {val.annotation}")
\ No newline at end of file
+FEATURES_PATH = os.path.join(config.ROOT, "ml_models", "model_features.pkl")
+
+
+@lru_cache(maxsize=None)
+def load_features() -> tuple[str, ...]:
+    """Load the final feature list saved earlier, on first use."""
+    # Imported lazily: the list of names is only needed once a consumer asks for it
+    import joblib
+
+    return tuple(joblib.load(FEATURES_PATH))
+
+@lru_cache(maxsize=None)
+def _build_credit_model(features_tuple: tuple[str, ...]) -> type[BaseModel]:
+    """Synthesize the input model once per feature list."""
+    fields = {
+        feature: (Optional[float], Field(default=None))
+        for feature in features_tuple
+    }
+    return create_model(
+        "CreditModelInput",
+        **fields
+    )
+
+def get_credit_model_input() -> type[BaseModel]:
+    return _build_credit_model(load_features())
+
+def __getattr__(name: str):
+    # Keeps `from src.models.ml import CreditModelInput, features` working without loading at import
+    if name == "CreditModelInput":
+        return get_credit_model_input()
+    if name == "features":
+        return list(load_features())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == '__main__':
+    for i in get_credit_model_input().model_fields.items():
+        key: str = i[0]
+        val: FieldInfo = i[1]
+        print(f"{key}: {val.annotation}")
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Literal
 from pydantic import BaseModel, Field
 
 class PersonHomeOwnership(str, Enum):
@@ -28,14 +29,25 @@ class CBPersonDefaultOnFile(str, Enum):
     Y = 'Y'
     N = 'N'
 
+# Field types for LoanApplication: pydantic-core checks a Literal against a set of
+# plain strings, so the model avoids enum coercion and stores the raw values
+HomeOwnershipValue = Literal['RENT', 'OWN', 'MORTGAGE', 'OTHER']
+LoanIntentValue = Literal['EDUCATION', 'MEDICAL', 'VENTURE', 'PERSONAL', 'DEBTCONSOLIDATION', 'HOMEIMPROVEMENT']
+LoanGradeValue = Literal['A', 'B', 'C', 'D', 'E', 'F', 'G']
+DefaultOnFileValue = Literal['Y', 'N']
+
 class LoanApplication(BaseModel):
     person_age: int = Field(..., description="Age of the person")
     person_income: float = Field(..., description="Annual income of the person")
-    person_home_ownership: PersonHomeOwnership = Field(..., description="Home ownership status")
+    person_home_ownership: HomeOwnershipValue = Field(..., description="Home ownership status")
     person_emp_length: float = Field(..., description="Employment length in years")
-    loan_intent: LoanIntent = Field(..., description="Intent of the loan")
-    loan_grade: LoanGrade = Field(..., description="Grade of the loan")
+    loan_intent: LoanIntentValue = Field(..., description="Intent of the loan")
+    loan_grade: LoanGradeValue = Field(..., description="Grade of the loan")
     loan_amnt: float = Field(..., description="Loan amount requested")
     loan_int_rate: float = Field(..., description="Interest rate of the loan")
-    cb_person_default_on_file: CBPersonDefaultOnFile = Field(..., description="Historical default status")
+    cb_person_default_on_file: DefaultOnFileValue = Field(..., description="Historical default status")
     cb_person_cred_hist_length: int = Field(..., description="Credit history length in years")
+
+class LoanPrediction(BaseModel):
+    prediction: int = Field(..., description="Predicted loan status (0=Non-Default, 1=Default)")
+    probability: float = Field(..., description="Probability of default")
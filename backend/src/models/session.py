@@ -1,6 +1,4 @@
 from pydantic import BaseModel, Field
-from pydantic.fields import FieldInfo
-import asyncio
 from typing import Optional
 from src.models.ml_model import LoanApplication
 
@@ -26,19 +24,18 @@ class EvaluationEvidence(BaseModel):
     text_content_key: Optional[str] = None  # References TextContent for re-evaluation
 
 class AppSession(BaseModel):
-    model_config = {"arbitrary_types_allowed": True}
-    
     session_id: int
     text_content_dict: dict[str, TextContent] = {}  # key -> TextContent for O(1) lookup
     evidence_list: list[EvaluationEvidence] = []
     user_profile: UserProfile | None = None
     loan_application: LoanApplication | None = None
-    
-    # Queue for streaming evidence (not serialized)
-    evidence_queue: Optional[asyncio.Queue] = Field(default=None, exclude=True)
     is_evaluating: bool = False
     pending_tasks: int = 0
 
+    # Running aggregates over valid evidence, kept in step by SessionService (not serialized)
+    valid_evidence: dict[int, EvaluationEvidence] = Field(default_factory=dict, exclude=True)
+    valid_score_total: int = Field(default=0, exclude=True)
+
 class AttachContentRequest(BaseModel):
     session_id: int
     text_content: TextContent
@@ -5,7 +5,9 @@ router = APIRouter()
 from .chatbot import router as chatbot_router
 from .evaluate import router as evaluate_router
 from .session import router as session_router
+from .ml import router as ml_router
 
 router.include_router(chatbot_router, prefix="/chat", tags=["chatbot"])
 router.include_router(evaluate_router, prefix="/evaluate", tags=["evaluate"])
-router.include_router(session_router, prefix="/session", tags=["session"])
\ No newline at end of file
+router.include_router(session_router, prefix="/session", tags=["session"])
+router.include_router(ml_router, prefix="/ml", tags=["ml"])
\ No newline at end of file
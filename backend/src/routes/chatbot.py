@@ -1,12 +1,19 @@
+from typing import TYPE_CHECKING
+
 from fastapi import APIRouter, HTTPException, status
 from src.models.chatbot import ChatResponse, SendMessage, AttachContent, ConfirmAction, ClearMemory, ContinueWithToolResult
-from src.llm.chatbot import Chatbot
+
+if TYPE_CHECKING:
+    from src.llm.chatbot import Chatbot
 
 router = APIRouter()
 
 
-def get_chatbot(current_user: int, thread_id: str) -> Chatbot:
-    return Chatbot(
+def get_chatbot(current_user: int | None, thread_id: str) -> "Chatbot":
+    # Imported lazily: langchain/langgraph are slow to import and not needed at boot
+    from src.llm.chatbot import Chatbot
+
+    return Chatbot.get(
         thread_id=thread_id,
         current_user=current_user
     )
@@ -1,15 +1,43 @@
 from fastapi import APIRouter, HTTPException, status
-from fastapi.responses import StreamingResponse
 from src.models.evaluate import EvaluationRequest, EvaluationEvidence
-from src.models.session import TextContent, AppSession, UpdateEvidenceRequest
-from src.services.evaluation.main_evaluator import start_evaluation
+from src.models.session import UpdateEvidenceRequest
 from src.services.session import session_service
-from sse_starlette.sse import EventSourceResponse
-import json
+from sse_starlette import EventSourceResponse, ServerSentEvent
+from pydantic import TypeAdapter
 import asyncio
+import orjson
 
 router = APIRouter()
 
+# Built once so every SSE event reuses the same serializer
+_EVIDENCE_ADAPTER = TypeAdapter(EvaluationEvidence)
+
+# Sent as-is when the stream fails, so the error path builds no model
+_STREAM_ERROR_DATA = _EVIDENCE_ADAPTER.dump_json(EvaluationEvidence(
+    score=0,
+    description="Error streaming evidence",
+    citation="",
+    source="System Error"
+)).decode()
+
+_SUMMARY_PROMPT_TEMPLATE = """You are a loan evaluation analyst. Generate a comprehensive summary of the loan evaluation results.
+
+{user_context}
+
+Total Score: {total_score:.1f}/100
+Total Evidence Reviewed: {valid_count}
+
+Evidence Details:
+{evidence_json}
+
+Please provide:
+1. An overall assessment of the loan application (2-3 sentences)
+2. Key positive factors (bullet points)
+3. Key risk factors or concerns (bullet points)
+4. Final recommendation (Approve/Conditional Approve/Deny with reasoning)
+
+Keep the summary professional, concise, and actionable."""
+
 
 @router.post("/start")
 async def start_loan_evaluation(request: EvaluationRequest):
@@ -17,6 +45,8 @@ async def start_loan_evaluation(request: EvaluationRequest):
     Triggers evaluation process without streaming.
     Evaluation runs in background and pushes results to session queue.
     """
+    from src.services.evaluation.main_evaluator import start_evaluation
+
     session = await session_service.get_session(request.session_id)
     if session is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
@@ -42,28 +72,38 @@ async def stream_evaluation_results(request: EvaluationRequest):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
     async def event_generator():
-        while True:
-            try:
-                # Wait for evidence from queue (blocks until available)
-                evidence = await session.evidence_queue.get()
+        # Registered here rather than in the route, so a response that never starts holds no queue
+        evidence_queue = await session_service.open_evidence_queue(request.session_id)
+        try:
+            while True:
+                try:
+                    # Wait for evidence from queue (blocks until available)
+                    batch = [await evidence_queue.get()]
+                    # Take whatever else is already queued so it goes out in one write
+                    while True:
+                        try:
+                            batch.append(evidence_queue.get_nowait())
+                        except asyncio.QueueEmpty:
+                            break
                 
-                # Only add to evidence_list if it's actual evidence, not system events
-                if evidence.event_type == "evidence":
-                    await session_service.add_evidence(session.session_id, evidence)
+                    # Evidence was already added to evidence_list when it was pushed
+                    frames = [
+                        ServerSentEvent(data=_EVIDENCE_ADAPTER.dump_json(evidence).decode()).encode()
+                        for evidence in batch
+                    ]
                 
-                yield {"data": evidence.model_dump_json()}
+                    # One event per evidence as before, encoded together into a single chunk
+                    yield b"".join(frames)
                 
-                # Send completion event but DON'T close stream
-                # Keep listening for re-evaluation results
+                    # Send completion event but DON'T close stream
+                    # Keep listening for re-evaluation results
                     
-            except Exception as e:
-                error_evidence = EvaluationEvidence(
-                    score=0,
-                    description=f"Error streaming evidence: {str(e)}",
-                    source="System Error"
-                )
-                yield {"data": error_evidence.model_dump_json()}
-                break
+                except Exception:
+                    yield {"data": _STREAM_ERROR_DATA}
+                    break
+        finally:
+            # The stream is over; don't keep its queue for the life of the process
+            await session_service.close_evidence_queue(request.session_id, evidence_queue)
 
     return EventSourceResponse(event_generator())
 
@@ -100,21 +140,18 @@ async def summarise_everything(request: EvaluationRequest):
             detail="No evidence found. Please run evaluation first."
         )
     
-    # Prepare evidence data for summarization
-    evidence_data = []
-    total_score = 0
-    valid_count = 0
-    
-    for evidence in session.evidence_list:
-        if evidence.event_type == "evidence" and evidence.valid:
-            evidence_data.append({
-                "score": evidence.score,
-                "description": evidence.description,
-                "source": evidence.source,
-                "citation": evidence.citation
-            })
-            total_score += evidence.score
-            valid_count += 1
+    # Prepare evidence data for summarization from the session's running aggregates
+    evidence_data = [
+        {
+            "score": evidence.score,
+            "description": evidence.description,
+            "source": evidence.source,
+            "citation": evidence.citation
+        }
+        for evidence in session.valid_evidence.values()
+    ]
+    total_score = session.valid_score_total
+    valid_count = len(evidence_data)
 
     total_score = min(100, max(0, total_score))
 
@@ -125,31 +162,22 @@ async def summarise_everything(request: EvaluationRequest):
         )
     
     # Prepare user context
-    user_context = ""
+    context_parts = []
     if session.user_profile:
-        user_context = f"Applicant Profile: Name: {session.user_profile.name}, Age: {session.user_profile.age}, Gender: {session.user_profile.gender}\n"
+        profile = session.user_profile
+        context_parts.append(f"Applicant Profile: Name: {profile.name}, Age: {profile.age}, Gender: {profile.gender}\n")
     
     if session.loan_application:
-        user_context += f"Loan Application: Amount: ${session.loan_application.loan_amnt}, Income: ${session.loan_application.person_income}, Grade: {session.loan_application.loan_grade}\n"
+        application = session.loan_application
+        context_parts.append(f"Loan Application: Amount: ${application.loan_amnt}, Income: ${application.person_income}, Grade: {application.loan_grade}\n")
     
     # Create prompt for LLM
-    prompt = f"""You are a loan evaluation analyst. Generate a comprehensive summary of the loan evaluation results.
-
-{user_context}
-
-Total Score: {total_score:.1f}/100
-Total Evidence Reviewed: {valid_count}
-
-Evidence Details:
-{json.dumps(evidence_data, indent=2)}
-
-Please provide:
-1. An overall assessment of the loan application (2-3 sentences)
-2. Key positive factors (bullet points)
-3. Key risk factors or concerns (bullet points)
-4. Final recommendation (Approve/Conditional Approve/Deny with reasoning)
-
-Keep the summary professional, concise, and actionable."""
+    prompt = _SUMMARY_PROMPT_TEMPLATE.format(
+        user_context="".join(context_parts),
+        total_score=total_score,
+        valid_count=valid_count,
+        evidence_json=orjson.dumps(evidence_data, option=orjson.OPT_INDENT_2).decode(),
+    )
 
     try:
         # Get summary from LLM
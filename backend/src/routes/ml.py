@@ -0,0 +1,24 @@
+from fastapi import APIRouter, status
+from src.models.ml_model import LoanApplication, LoanPrediction
+import asyncio
+
+router = APIRouter()
+
+
+@router.post("/predict", response_model=list[LoanPrediction], status_code=status.HTTP_200_OK)
+async def predict(applications: list[LoanApplication]):
+    """
+    Predict loan status for a batch of applications in a single model pass.
+    """
+    from src.ml.infer import predict_batch, get_inference_executor
+
+    if not applications:
+        return []
+
+    prediction, probability = await asyncio.get_running_loop().run_in_executor(
+        get_inference_executor(), predict_batch, applications
+    )
+    return [
+        LoanPrediction(prediction=int(pred), probability=float(prob))
+        for pred, prob in zip(prediction, probability)
+    ]
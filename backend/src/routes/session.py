@@ -31,7 +31,7 @@ async def update_session(request: UpdateProfileRequest):
     session.user_profile = request.user_profile
     session.loan_application = request.loan_application
     session.text_content_dict.clear()
-    session.evidence_list = []
+    await session_service.clear_evidence(session.session_id)
     return session
 
 @router.post("/reset")
@@ -40,5 +40,5 @@ async def reset_session(session_id: int):
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     session.text_content_dict.clear()
-    session.evidence_list = []
+    await session_service.clear_evidence(session.session_id)
     return session
\ No newline at end of file
@@ -1,19 +1,67 @@
 from src.models.evaluate import EvaluationRequest, EvaluationEvidence, UserProfile
 import asyncio
+import hashlib
+import logging
+from typing import AsyncIterator
 
+from cachetools import TTLCache
 
+from src.config import LLM_CONCURRENCY
 from src.llm.rotating_llm import rotating_llm
 from src.models.session import TextContent
 
+# Static instructions go in the system message, ahead of anything per-call, so
+# providers with prefix caching (OpenAI's automatic cache) can reuse them
+_SCORING_INSTRUCTIONS = """Analyze the text for behavioral signals and assign a score based on the following criteria:
+- GOOD: 1 (Verified with evidence, logical behavior, stable employment)
+- NORMAL: 0 (Neutral, standard behavior)
+- MINOR ISSUE: -5 (Slight concerns, illogical description, suspicious writings)
+- WARNING: -10 (Red flags, gambling, instability, high risk, major inconsistencies)
 
-async def llm_evaluate_loan(
-	content: TextContent,
-	other_evidence_tasks: list[asyncio.Task[EvaluationEvidence]] = None,
-	objective: str = None,
-	set_text_content_key: bool = True
-) -> list[EvaluationEvidence]:
-	other_evidence_tasks = other_evidence_tasks or []
-	
+Return a JSON object with the following field:
+- "evidence": A list of evidence items. Each item should have:
+	- "score": The integer score assigned (1, 0, -5, or -10).
+	- "citation": The exact excerpt from the text that supports this evaluation (quote it directly, not more than 10 words).
+	- "description": A brief explanation of why this citation is concerning or noteworthy. Not more than 15 words.
+
+If there is no evidence of concerning or noteworthy behavior, return an empty list for "evidence".
+"""
+
+# Special instructions for web search results
+_WEB_SEARCH_WARNING = """
+IMPORTANT: This text comes from web search results that have already been verified to match the applicant's identity.
+However, be CAUTIOUS:
+- Only cite information that is clearly relevant to credit risk
+- Positive professional information (employment, achievements) should score +1
+- Absence of negative information is NOT evidence (don't score it)
+- Only assign negative scores (-5, -10) if you find actual concerning behavior (gambling, fraud, legal issues, financial instability)
+- If the information is neutral or just biographical, return empty evidence list
+"""
+
+_SYSTEM_PROMPT = _SCORING_INSTRUCTIONS
+_WEB_SEARCH_SYSTEM_PROMPT = _SCORING_INSTRUCTIONS + _WEB_SEARCH_WARNING
+
+logger = logging.getLogger(__name__)
+
+_LLM_SEMAPHORE = asyncio.Semaphore(LLM_CONCURRENCY)
+
+_DEFAULT_INSTRUCTION = "You are a credit score evaluator for a bank. Your task is to analyze the following text from a loan applicant and evaluate their behavior."
+
+# Evidence items from successful evaluations, keyed by a digest of the exact prompt.
+# Scoring runs above temperature 0, which the LLM-level cache skips, so re-runs and
+# duplicate uploads of the same text are answered from here instead
+_EVIDENCE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=3600)
+
+
+def _evidence_cache_key(messages: list[dict[str, str]]) -> bytes:
+	digest = hashlib.blake2b(digest_size=16)
+	for message in messages:
+		digest.update(message["text"].encode())
+		digest.update(b"\0")
+	return digest.digest()
+
+
+async def _gather_other_evidence(other_evidence_tasks: list[asyncio.Task[EvaluationEvidence]]) -> list[EvaluationEvidence]:
 	# Wait for other evidence (e.g. ML score) to provide context
 	other_evidence_list: list[EvaluationEvidence] = []
 	if other_evidence_tasks:
@@ -25,95 +73,156 @@ async def llm_evaluate_loan(
 					other_evidence_list.append(res)
 				elif isinstance(res, list): # Handle list of evidence
 					other_evidence_list.extend([item for item in res if isinstance(item, EvaluationEvidence)])
-		except Exception as e:
-			print(f"Error gathering other evidence: {e}")
+		except Exception:
+			logger.exception("Error gathering other evidence")
+	return other_evidence_list
 
-	base_instruction = "You are a credit score evaluator for a bank. Your task is to analyze the following text from a loan applicant and evaluate their behavior."
-	is_web_search = content.source.startswith("web_search")
-	
+
+def format_evidence_context(other_evidence_list: list[EvaluationEvidence]) -> str:
+	"""Render other evidence (e.g. the ML score) as the context block of the prompt."""
+	if not other_evidence_list:
+		return ""
+	return "\n\nAdditional Context from other Evidence:\n" + "".join(
+		f"- Score: {ev.score}\n- Insight: {ev.description}\n" for ev in other_evidence_list
+	)
+
+
+async def gather_evidence_context(other_evidence_tasks: list[asyncio.Task[EvaluationEvidence]]) -> str:
+	"""Wait for the other evidence tasks and render their context block once."""
+	return format_evidence_context(await _gather_other_evidence(other_evidence_tasks))
+
+
+def _build_messages(content: TextContent, context_info: str, objective: str | None) -> list[dict[str, str]]:
+	instruction = _DEFAULT_INSTRUCTION
 	if objective:
-		base_instruction = f"You are a risk analyst. Your task is to analyze the following text with this objective: {objective}"
-
-	# Add context from other evidence (e.g. ML model)
-	context_info = ""
-	if other_evidence_list:
-		context_info += "\n\nAdditional Context from other Evidence:\n"
-		for ev in other_evidence_list:
-			context_info += f"- Score: {ev.score}\n- Insight: {ev.description}\n"
-
-	# Special instructions for web search results
-	web_search_warning = ""
-	if is_web_search:
-		web_search_warning = """
-	IMPORTANT: This text comes from web search results that have already been verified to match the applicant's identity.
-	However, be CAUTIOUS:
-	- Only cite information that is clearly relevant to credit risk
-	- Positive professional information (employment, achievements) should score +1
-	- Absence of negative information is NOT evidence (don't score it)
-	- Only assign negative scores (-5, -10) if you find actual concerning behavior (gambling, fraud, legal issues, financial instability)
-	- If the information is neutral or just biographical, return empty evidence list
+		instruction = f"You are a risk analyst. Your task is to analyze the following text with this objective: {objective}"
+
+	is_web_search = content.source.startswith("web_search")
+	return [
+		{"role": "system", "text": _WEB_SEARCH_SYSTEM_PROMPT if is_web_search else _SYSTEM_PROMPT},
+		{"role": "user", "text": f"""{instruction}{context_info}
+
+Text to evaluate:
+"{content.text}"
+"""},
+	]
+
+
+def is_worth_evaluating(text: str) -> bool:
+	"""
+	Whether text carries enough content to be worth an LLM call: at least 40 characters,
+	of which at least 8 are distinct non-whitespace characters. Counting characters rather
+	than words keeps text written without spaces (e.g. CJK) from being dropped.
 	"""
+	stripped = text.strip()
+	return len(stripped) >= 40 and len({ch for ch in stripped if not ch.isspace()}) >= 8
 
-	prompt = f"""
-	{base_instruction}
-	{context_info}
-	{web_search_warning}
-	
-	Text to evaluate:
-	"{content.text}"
-	
-	Analyze the text for behavioral signals and assign a score based on the following criteria:
-	- GOOD: 1 (Verified with evidence, logical behavior, stable employment)
-	- NORMAL: 0 (Neutral, standard behavior)
-	- MINOR ISSUE: -5 (Slight concerns, illogical description, suspicious writings)
-	- WARNING: -10 (Red flags, gambling, instability, high risk, major inconsistencies)
-	
-	Return a JSON object with the following field:
-	- "evidence": A list of evidence items. Each item should have:
-		- "score": The integer score assigned (1, 0, -5, or -10).
-		- "citation": The exact excerpt from the text that supports this evaluation (quote it directly, not more than 10 words).
-		- "description": A brief explanation of why this citation is concerning or noteworthy. Not more than 15 words.
-	
-	If there is no evidence of concerning or noteworthy behavior, return an empty list for "evidence".
+
+def _to_evidence(item: dict, source: str, text_content_key: str | None) -> EvaluationEvidence:
+	# Every field is coerced to its declared type here, so the model is built without re-validation
+	score = item.get("score", 0)
+	try:
+		score = int(score)
+	except (TypeError, ValueError):
+		score = 0
+	description = item.get("description")
+	citation = item.get("citation")
+	return EvaluationEvidence.model_construct(
+		score=score,
+		description=description if isinstance(description, str) else "No description provided.",
+		citation=citation if isinstance(citation, str) else "",
+		source=source,
+		text_content_key=text_content_key
+	)
+
+
+async def _stream_items_limited(messages: list[dict[str, str]]) -> AsyncIterator[dict]:
 	"""
+	Stream evidence items from the LLM, holding an _LLM_SEMAPHORE permit only for the LLM call.
+
+	A background task reads the reply into a local queue, so the permit is released
+	as soon as the LLM finishes even if the consumer is still blocked pushing items.
+	"""
+	items: asyncio.Queue = asyncio.Queue()
+	done = object()
+
+	async def produce():
+		try:
+			async with _LLM_SEMAPHORE:
+				async for item in rotating_llm.stream_json_items(
+					messages=messages,
+					temperature=0.3 # Low temperature for consistent scoring
+				):
+					items.put_nowait(item)
+		finally:
+			items.put_nowait(done)
 
+	producer = asyncio.create_task(produce())
 	try:
-		response = await rotating_llm.send_message_get_json(
-			messages=prompt,
-			temperature=0.3 # Low temperature for consistent scoring
-		)
-		if response["status"] == "ok" and "json" in response:
-			data = response["json"]
-			evidence_list = data.get("evidence", [])
-			
-			# Convert each evidence item to EvaluationEvidence object
-			result = []
-			for item in evidence_list:
-				evidence = EvaluationEvidence(
-					score=item.get("score", 0),
-					description=item.get("description", "No description provided."),
-					citation=item.get("citation", ""),
-					source=content.key,
-					text_content_key=content.key if set_text_content_key else None
-				)
-				result.append(evidence)
-			return result
-		else:
-			return [EvaluationEvidence(
-				score=0,
-				description=f"Failed to evaluate text: {response.get('text', 'Unknown error')}",
-				citation="",
-				source=content.key,
-				text_content_key=content.key if set_text_content_key else None
-			)]
+		while (item := await items.get()) is not done:
+			yield item
+		# Re-raise the LLM error, if there was one
+		await producer
+	finally:
+		producer.cancel()
+
+
+async def llm_evaluate_loan_stream(
+	content: TextContent,
+	other_evidence_tasks: list[asyncio.Task[EvaluationEvidence]] = None,
+	objective: str = None,
+	set_text_content_key: bool = True,
+	context_info: str | None = None
+) -> AsyncIterator[EvaluationEvidence]:
+	"""
+	Yields each evidence item as soon as the LLM has finished writing it,
+	instead of waiting for the whole {"evidence": [...]} reply.
+
+	Pass context_info (from gather_evidence_context) when several evaluations
+	share the same other evidence, so it is awaited and formatted only once.
+	"""
+	if context_info is None:
+		context_info = await gather_evidence_context(other_evidence_tasks or [])
+	messages = _build_messages(content, context_info, objective)
+	text_content_key = content.key if set_text_content_key else None
+
+	cache_key = _evidence_cache_key(messages)
+	cached = _EVIDENCE_CACHE.get(cache_key)
+	if cached is not None:
+		for item in cached:
+			yield _to_evidence(item, content.key, text_content_key)
+		return
+
+	items = []
+	try:
+		async for item in _stream_items_limited(messages):
+			items.append(item)
+			yield _to_evidence(item, content.key, text_content_key)
 	except Exception as e:
-		return [EvaluationEvidence(
+		yield EvaluationEvidence(
 			score=0,
 			description=f"Error during LLM evaluation: {str(e)}",
 			citation="",
 			source=content.key,
-			text_content_key=content.key if set_text_content_key else None
-		)]
+			text_content_key=text_content_key
+		)
+		return
+
+	# Only complete replies are cached
+	_EVIDENCE_CACHE[cache_key] = tuple(items)
+
+
+async def llm_evaluate_loan(
+	content: TextContent,
+	other_evidence_tasks: list[asyncio.Task[EvaluationEvidence]] = None,
+	objective: str = None,
+	set_text_content_key: bool = True
+) -> list[EvaluationEvidence]:
+	return [
+		evidence async for evidence in llm_evaluate_loan_stream(
+			content, other_evidence_tasks, objective, set_text_content_key
+		)
+	]
 
 if __name__ == '__main__':
 	async def main():
@@ -2,10 +2,27 @@ from src.models.evaluate import EvaluationRequest, EvaluationEvidence
 from src.models.ml_model import LoanApplication
 from src.services.session import session_service
 from src.services.evaluation.ml_evaluator import ml_evaluate_loan
-from src.services.evaluation.llm_evaluator import llm_evaluate_loan
+from src.services.evaluation.llm_evaluator import llm_evaluate_loan_stream, gather_evidence_context, is_worth_evaluating
 from src.services.evaluation.web_evaluator import generate_web_tasks
 import asyncio
 
+# Start/complete markers are the same for every session and are never stored or
+# mutated (only event_type "evidence" is), so one shared instance of each is queued
+_START_EVENT = EvaluationEvidence(
+    score=0,
+    description="Evaluation started",
+    citation="",
+    source="System",
+    event_type="evaluation_start"
+)
+_COMPLETE_EVENT = EvaluationEvidence(
+    score=0,
+    description="Initial evaluation completed",
+    citation="",
+    source="System",
+    event_type="evaluation_complete"
+)
+
 
 async def start_evaluation(session_id: int) -> None:
     """
@@ -20,14 +37,7 @@ async def start_evaluation(session_id: int) -> None:
     await session_service.start_evaluation(session_id)
 
     # Send start event
-    start_event = EvaluationEvidence(
-        score=0,
-        description="Evaluation started",
-        citation="",
-        source="System",
-        event_type="evaluation_start"
-    )
-    await session_service.push_evidence_to_stream(session_id, start_event)
+    await session_service.push_evidence_to_stream(session_id, _START_EVENT)
 
     # 1. ML Evaluation
     ml_task = asyncio.create_task(ml_evaluate_loan(session.loan_application))
@@ -35,46 +45,70 @@ async def start_evaluation(session_id: int) -> None:
     # 2. Web Evaluation Tasks
     web_tasks = await generate_web_tasks(session_id)
 
-    # 3. LLM Evaluation Tasks for all text content
+    # 3. LLM Evaluation Tasks for all text content; each pushes its evidence
+    # to the stream item by item as the LLM writes it, and returns nothing.
+    # The ML result is awaited and rendered as prompt context once for all of them
+    ml_context_task = asyncio.create_task(gather_evidence_context([ml_task]))
+
+    async def stream_llm_evidence(content):
+        context_info = await ml_context_task
+        async for evidence in llm_evaluate_loan_stream(content, context_info=context_info):
+            await session_service.push_evidence_to_stream(session_id, evidence)
+
+    # Short texts and repeats of an earlier text get a note instead of an LLM call
     llm_tasks = []
-    if session.text_content_dict:
-        for content in session.text_content_dict.values():
-            llm_tasks.append(asyncio.create_task(llm_evaluate_loan(content, [ml_task])))
+    evaluated_texts: dict[str, str] = {}  # whitespace-normalized text -> key it is evaluated under
+    for content in session.text_content_dict.values():
+        normalized = " ".join(content.text.split())
+        if not is_worth_evaluating(normalized):
+            skip_reason = "Text too short to evaluate"
+        elif normalized in evaluated_texts:
+            skip_reason = f"Same text as {evaluated_texts[normalized]}; evaluated there"
+        else:
+            evaluated_texts[normalized] = content.key
+            llm_tasks.append(asyncio.create_task(stream_llm_evidence(content)))
+            continue
+
+        await session_service.push_evidence_to_stream(session_id, EvaluationEvidence(
+            score=0,
+            description=skip_reason,
+            citation="",
+            source=content.key,
+            text_content_key=content.key
+        ))
 
     # Combine all tasks
     all_tasks = [ml_task] + web_tasks + llm_tasks
     session.pending_tasks = len(all_tasks)
 
+    # Each task's results are pushed the moment that task finishes, with no
+    # single loop in between that would handle one completed task at a time
+    async def push_result(task: asyncio.Task) -> None:
+        try:
+            result = await task
+            
+            # Result can be a single Evidence or a list of Evidence
+            if isinstance(result, list):
+                for item in result:
+                    await session_service.push_evidence_to_stream(session_id, item)
+            elif isinstance(result, EvaluationEvidence):
+                await session_service.push_evidence_to_stream(session_id, result)
+                
+        except Exception as e:
+            error_evidence = EvaluationEvidence(
+                score=0,
+                description=f"Error in evaluation task: {str(e)}",
+                citation="",
+                source="System Error"
+            )
+            await session_service.push_evidence_to_stream(session_id, error_evidence)
+
     # Background task to process results and push to queue
     async def process_tasks():
-        for future in asyncio.as_completed(all_tasks):
-            try:
-                result = await future
-                
-                # Result can be a single Evidence or a list of Evidence
-                if isinstance(result, list):
-                    for item in result:
-                        await session_service.push_evidence_to_stream(session_id, item)
-                elif isinstance(result, EvaluationEvidence):
-                    await session_service.push_evidence_to_stream(session_id, result)
-                    
-            except Exception as e:
-                error_evidence = EvaluationEvidence(
-                    score=0,
-                    description=f"Error in evaluation task: {str(e)}",
-                    source="System Error"
-                )
-                await session_service.push_evidence_to_stream(session_id, error_evidence)
+        await asyncio.gather(*(push_result(task) for task in all_tasks))
         
         # Send completion event
-        completion_event = EvaluationEvidence(
-            score=0,
-            description="Initial evaluation completed",
-            citation="",
-            source="System",
-            event_type="evaluation_complete"
-        )
-        await session_service.push_evidence_to_stream(session_id, completion_event)
+        await session_service.push_evidence_to_stream(session_id, _COMPLETE_EVENT)
         await session_service.finish_evaluation(session_id)
 
     # Start background processing
@@ -135,8 +169,9 @@ if __name__ == "__main__":
         
         # 4. Stream results from queue
         print("Streaming results...")
+        evidence_queue = await session_service.get_evidence_queue(session.session_id)
         while True:
-            evidence = await session.evidence_queue.get()
+            evidence = await evidence_queue.get()
             print(f"\nReceived Evidence:")
             print(f"  Score: {evidence.score}")
             print(f"  Description: {evidence.description}")
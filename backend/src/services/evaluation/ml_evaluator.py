@@ -1,7 +1,8 @@
 # uses machine learning model to produce a credit score with evidence
 from src.models.ml_model import LoanApplication
 from src.models.session import EvaluationEvidence
-from src.ml.infer import predict_loan_status
+from src.ml.infer import predict_loan_status, get_inference_executor
+from functools import partial
 import asyncio
 
 async def ml_evaluate_loan(loan_application: LoanApplication) -> EvaluationEvidence:
@@ -13,10 +14,10 @@ async def ml_evaluate_loan(loan_application: LoanApplication) -> EvaluationEvide
             source="Machine Learning Model"
         )
 
-    # Run inference in a separate thread to avoid blocking
+    # Run inference on the dedicated inference threads to avoid blocking
     try:
-        prediction, probability, explanation = await asyncio.to_thread(
-            predict_loan_status, loan_application, include_explanation=True
+        prediction, probability, explanation = await asyncio.get_running_loop().run_in_executor(
+            get_inference_executor(), partial(predict_loan_status, loan_application, include_explanation=True)
         )
         
         # Probability is prob of Default (1).
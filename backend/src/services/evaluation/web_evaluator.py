@@ -113,7 +113,7 @@ async def _generate_queries(session_id: int) -> list[dict]:
         context_text += f"LOAN APPLICATION DETAILS:\n"
         context_text += f"- Loan Amount: ${app.loan_amnt}\n"
         context_text += f"- Annual Income: ${app.person_income}\n"
-        context_text += f"- Loan Intent: {app.loan_intent.value}\n"
+        context_text += f"- Loan Intent: {app.loan_intent}\n"
         context_text += f"- Employment Length: {app.person_emp_length} years\n\n"
         
     context_text += "\n\n".join([
@@ -3,6 +3,9 @@ from src.models.session import UserProfile, AppSession
 from src.models.session import TextContent, EvaluationEvidence
 import asyncio
 
+# Bound on evidence waiting for an SSE reader; once full the oldest event is dropped
+EVIDENCE_QUEUE_MAXSIZE = 256
+
 
 class SessionService:
     """
@@ -12,6 +15,10 @@ class SessionService:
     
     # Class variable to store all sessions in memory
     _sessions: dict[int, AppSession] = {}
+    # Evidence queues live beside the sessions so AppSession stays a plain schema model
+    _evidence_queues: dict[int, asyncio.Queue] = {}
+    # Number of open streams reading each queue, so a shared queue outlives all but its last reader
+    _evidence_readers: dict[int, int] = {}
     _next_session_id: int = 1
     async def create_session(self, user_profile: UserProfile = None, loan_application: LoanApplication = None) -> AppSession:
         """
@@ -24,10 +31,10 @@ class SessionService:
         new_session = AppSession(
             session_id=session_id,
             user_profile=user_profile,
-            loan_application=loan_application,
-            evidence_queue=asyncio.Queue()
+            loan_application=loan_application
         )
         self._sessions[session_id] = new_session
+        self._evidence_queues[session_id] = asyncio.Queue(maxsize=EVIDENCE_QUEUE_MAXSIZE)
         
         return new_session
 
@@ -37,6 +44,43 @@ class SessionService:
         """
         return self._sessions.get(session_id, None)
 
+    async def get_evidence_queue(self, session_id: int) -> asyncio.Queue | None:
+        """
+        Retrieves the evidence stream queue of a session, creating it if it was closed.
+        Returns None if the session is not found.
+        """
+        if session_id not in self._sessions:
+            return None
+        queue = self._evidence_queues.get(session_id)
+        if queue is None:
+            queue = self._evidence_queues[session_id] = asyncio.Queue(maxsize=EVIDENCE_QUEUE_MAXSIZE)
+        return queue
+
+    async def open_evidence_queue(self, session_id: int) -> asyncio.Queue | None:
+        """
+        Retrieves the evidence stream queue of a session for a new reader, who must
+        hand it back through close_evidence_queue. Returns None if the session is not found.
+        """
+        queue = await self.get_evidence_queue(session_id)
+        if queue is not None:
+            self._evidence_readers[session_id] = self._evidence_readers.get(session_id, 0) + 1
+        return queue
+
+    async def close_evidence_queue(self, session_id: int, queue: asyncio.Queue) -> None:
+        """
+        Releases a reader's evidence stream queue, dropping the queue once its last reader is gone.
+        Evidence pushed afterwards is still recorded on the session.
+        """
+        readers = self._evidence_readers.get(session_id, 0) - 1
+        if readers > 0:
+            # Another stream (e.g. a reconnected client) is still reading this queue
+            self._evidence_readers[session_id] = readers
+            return
+        self._evidence_readers.pop(session_id, None)
+        # Leave a queue that has since replaced this one alone
+        if self._evidence_queues.get(session_id) is queue:
+            del self._evidence_queues[session_id]
+
     async def add_text_content(self, session_id: int, content: TextContent) -> AppSession:
         """
         Adds text content to a specific session.
@@ -87,19 +131,54 @@ class SessionService:
         evidence.id = len(session.evidence_list) + 1
         
         session.evidence_list.append(evidence)
+        if evidence.event_type == "evidence" and evidence.valid:
+            self._count_valid(session, evidence)
         return session
 
+    async def clear_evidence(self, session_id: int) -> AppSession:
+        """
+        Removes all evidence from a session and resets its running aggregates.
+        """
+        session = self._sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+
+        session.evidence_list = []
+        session.valid_evidence.clear()
+        session.valid_score_total = 0
+        return session
+
+    @staticmethod
+    def _count_valid(session: AppSession, evidence: EvaluationEvidence) -> None:
+        session.valid_evidence[evidence.id] = evidence
+        session.valid_score_total += evidence.score
+
+    @staticmethod
+    def _uncount_valid(session: AppSession, evidence: EvaluationEvidence) -> None:
+        if session.valid_evidence.pop(evidence.id, None) is not None:
+            session.valid_score_total -= evidence.score
+
     async def push_evidence_to_stream(self, session_id: int, evidence: EvaluationEvidence) -> None:
         """
-        Push evidence to the session's queue for streaming.
+        Record evidence on the session and push it to the session's queue for streaming.
         This allows dynamic addition of evidence during evaluation.
         """
         session = self._sessions.get(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
         
-        if session.evidence_queue:
-            await session.evidence_queue.put(evidence)
+        # Persist here rather than in the SSE reader, so evidence is kept
+        # even when nobody is streaming (only actual evidence, not system events)
+        if evidence.event_type == "evidence":
+            await self.add_evidence(session_id, evidence)
+        
+        queue = self._evidence_queues.get(session_id)
+        if queue is not None:
+            # Never block the producer: a slow or absent reader loses the
+            # oldest queued event, which is still in evidence_list
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(evidence)
 
     async def start_evaluation(self, session_id: int) -> None:
         """
@@ -110,8 +189,8 @@ class SessionService:
             raise ValueError(f"Session {session_id} not found")
         
         session.is_evaluating = True
-        if session.evidence_queue is None:
-            session.evidence_queue = asyncio.Queue()
+        if session_id not in self._evidence_queues:
+            self._evidence_queues[session_id] = asyncio.Queue(maxsize=EVIDENCE_QUEUE_MAXSIZE)
 
     async def finish_evaluation(self, session_id: int) -> None:
         """
@@ -135,6 +214,11 @@ class SessionService:
             
         for evidence in session.evidence_list:
             if evidence.id == evidence_id:
+                if evidence.event_type == "evidence" and valid != evidence.valid:
+                    if valid:
+                        self._count_valid(session, evidence)
+                    else:
+                        self._uncount_valid(session, evidence)
                 evidence.valid = valid
                 evidence.invalidate_reason = invalidate_reason
                 
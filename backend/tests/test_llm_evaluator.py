@@ -0,0 +1,24 @@
+from src.services.evaluation.llm_evaluator import is_worth_evaluating
+
+
+def test_short_text_is_not_worth_evaluating():
+    assert not is_worth_evaluating("thanks!")
+    assert not is_worth_evaluating("   ")
+
+
+def test_repeated_character_is_not_worth_evaluating():
+    assert not is_worth_evaluating("." * 200)
+
+
+def test_long_english_text_is_worth_evaluating():
+    assert is_worth_evaluating("I have worked as a nurse for six years and pay my rent on time.")
+
+
+def test_long_cjk_text_is_worth_evaluating():
+    text = "本人在同一家公司全职工作已满六年，月收入稳定，每月按时缴纳房租和信用卡账单，从未有过逾期记录。"
+    assert " " not in text
+    assert is_worth_evaluating(text)
+
+
+def test_long_unbroken_token_is_worth_evaluating():
+    assert is_worth_evaluating("https://example.com/statements/2024/" + "aZ09" * 20)